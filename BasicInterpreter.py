@@ -1,18 +1,49 @@
-from ExpressionInterpreter import ExpressionInterpreter
+from ExpressionInterpreter import ExpressionInterpreter, parse_number
 from FunctionDefinition import FunctionDefinition
+from Keywords import leading_keyword, normalize_keyword
+from ProgramStore import ProgramStore
+from TerminalOutput import AnsiTerminal
 from ValueType import ValueType
+from bisect import bisect_left, bisect_right
+from functools import partial
 from re import split as re_split
 from random import seed
+from sys import intern
 from time import sleep
 
 class BasicInterpreter:
 
-    _ansi_colors = { 0: 0, 1: 4, 2: 1, 3: 5, 4: 2, 5: 6, 6: 3, 7: 7 }
-
-    def __init__(self):
-        self._program = []          # [(line_number, code)]
+    # Sentencias predefinidas: palabra clave -> método que la ejecuta
+    _STATEMENTS = {
+        "PRINT": "execute_print",
+        "GOTO": "execute_goto",
+        "LET": "execute_let",
+        "IF": "execute_if",
+        "INPUT": "execute_input",
+        "FOR": "execute_for",
+        "NEXT": "execute_next",
+        "REM": "execute_rem",
+        "STOP": "execute_stop",
+        "GOSUB": "execute_gosub",
+        "RETURN": "execute_return",
+        "READ": "execute_read",
+        "RESTORE": "execute_restore",
+        "RANDOMIZE": "execute_randomize",
+        "DEF": "execute_def",
+        "CLS": "execute_cls",
+        "WAIT": "execute_wait",
+        "INK": "execute_ink",
+        "PAPER": "execute_paper",
+        "BRIGHT": "execute_bright",
+        "FLASH": "execute_flash",
+    }
+
+    def __init__(self, static_check=True, output=None, fn_cache_size=256):
+        self._program = ProgramStore()  # (line_number, part_index, code) of each statement
         self._line_index = {}       # line_number -> index in program
+        self._source_lines = {}     # line_number -> source code, for LIST
         self._pc = 0                # program counter
+        self._direct = False        # executing a line without number (direct mode)
         self._num_variables = {}
         self._str_variables = {}
         self._functions = {}
@@ -22,18 +53,24 @@ class BasicInterpreter:
         self._data_buffer = []
         self._data_buffer_index = 0
         self._restore_line_index = {}
-        self._bright = False
-        self._ink_color = 7
-        self._paper_color = 0
+        self._data_lines = {}       # line_number -> [DATA elements]
+        self._output = output if output is not None else AnsiTerminal()
+        self._static_check = static_check
+        self._analysis = None
+        self._tracer = None
+        self._input_function = input
+        self._fn_cache_size = fn_cache_size
+        self._statements = {keyword: getattr(self, method) for keyword, method in BasicInterpreter._STATEMENTS.items()}
+        self._statement_parsers = {}    # keyword -> parse function of the registered statements
         
     def load(self, stream):
         """
         stream: iterable de líneas (archivo, lista, etc.)
         """
-        self._program = []
+        entries = []
         self._line_index = {}
-        self._data_buffer = []
-        self._data_buffer_index = 0
+        self._source_lines = {}
+        self._data_lines = {}
         
         for raw_line in stream:
             raw_line = raw_line.strip()
@@ -41,123 +78,281 @@ class BasicInterpreter:
                 continue
 
             number_str, code = raw_line.split(" ", 1)
-            code_parts = re_split(r':(?=(?:[^"]*"[^"]*")*[^"]*$)', code)
-            part_index = 0
             number = int(number_str)
-            for code_part in code_parts:
-                code_part = code_part.strip()
-                if code_part.startswith("DATA"):
-                    self.execute_data(number, code_part)
-                elif code_part.startswith("REM"):
-                    self._program.append((number, part_index, "REM"))
-                    break
-                else:
-                    self._program.append((number, part_index, code_part))                
-                    part_index += 1
+            self._source_lines[number] = code
+            entries += self._split_line(number, code)
 
         # ordenar por número de línea
-        self._program.sort(key=lambda x: (x[0], x[1]))
+        entries.sort(key=lambda x: (x[0], x[1]))
+        self._program = ProgramStore(entries)
 
         # crear índice rápido para GOTO
-        for idx, (line_number, _, _) in enumerate(self._program):
-            if not line_number in self._line_index:
+        self._index_lines(0, len(self._program))
+        self._build_data_buffer()
+
+        self._analysis = None
+        if self._static_check:
+            self._analyze()
+
+    def store_line(self, number, code):
+        """
+        Inserta o reemplaza la línea indicada del programa, o la borra si code está vacío.
+        Solo se reindexan las entradas desplazadas por el cambio.
+        """
+        line_numbers = self._program.line_numbers
+        start = bisect_left(line_numbers, number)
+        end = bisect_right(line_numbers, number, start)
+        had_data = self._data_lines.pop(number, None) is not None
+
+        code = code.strip()
+        if code:
+            self._source_lines[number] = code
+            entries = self._split_line(number, code)
+        else:
+            self._source_lines.pop(number, None)
+            entries = []
+
+        self._program.replace(start, end, entries)
+        if not entries:
+            self._line_index.pop(number, None)
+        self._index_lines(start, start + len(entries) if len(entries) == end - start else len(self._program))
+        if len(entries) != end - start:
+            self._shift_resume_points(start, end, len(entries))
+
+        if had_data or number in self._data_lines:
+            self._build_data_buffer()
+        self._analysis = None
+        self._expr_interpreter.set_numeric_expressions(())
+
+    def _shift_resume_points(self, start, end, size):
+        """
+        Corrige los índices guardados para CONTINUE (pc, pila de GO SUB y líneas de los FOR)
+        tras sustituir las sentencias [start, end) por size sentencias nuevas
+        """
+        delta = size - (end - start)
+
+        def shifted(idx, inside):
+            if idx >= end:
+                return idx + delta
+            if idx >= start:
+                return inside
+            return idx
+
+        # El pc apunta a la sentencia que se ejecutará: si se ha editado, la línea nueva
+        # se ejecuta desde el principio
+        self._pc = shifted(self._pc, start)
+        # GO SUB y FOR guardan su propio índice y se reanudan en la sentencia siguiente:
+        # si se ha editado, se continúa tras la línea nueva
+        after = start + size - 1
+        self._return_stack = [shifted(idx, after) for idx in self._return_stack]
+        for name, idx in self._num_variables.items():
+            if name.startswith("for_num_codeline_"):
+                self._num_variables[name] = shifted(idx, after)
+
+    def list_lines(self, first_line=0):
+        """Devuelve [(número de línea, código fuente)] desde first_line"""
+        return [(number, self._source_lines[number]) for number in sorted(self._source_lines) if number >= first_line]
+
+    def _split_line(self, number, code):
+        """Divide una línea en sentencias (line_number, part_index, code); los DATA se guardan aparte"""
+        entries = []
+        code_parts = re_split(r':(?=(?:[^"]*"[^"]*")*[^"]*$)', code)
+        part_index = 0
+        for code_part in code_parts:
+            code_part = code_part.strip()
+            keyword = leading_keyword(code_part)
+            if keyword == "DATA":
+                self.execute_data(number, code_part)
+            elif keyword == "REM":
+                entries.append((number, part_index, "REM"))
+                break
+            else:
+                entries.append((number, part_index, code_part))
+                part_index += 1
+        return entries
+
+    def _index_lines(self, start, end):
+        line_numbers = self._program.line_numbers
+        for idx in range(start, end):
+            line_number = line_numbers[idx]
+            if idx == 0 or line_numbers[idx - 1] != line_number:
                 self._line_index[line_number] = idx
 
+    def _build_data_buffer(self):
+        self._data_buffer = []
+        self._data_buffer_index = 0
+        self._restore_line_index = {}
+        for line_number in sorted(self._data_lines):
+            self._restore_line_index[line_number] = len(self._data_buffer)
+            self._data_buffer += self._data_lines[line_number]
+
+    def _analyze(self):
+        self._analysis = self._run_analyzer()
+        self._expr_interpreter.set_numeric_expressions(self._analysis.numeric_expressions)
+
+    def _run_analyzer(self, defined=(), functions=None):
+        from ProgramAnalyzer import ProgramAnalyzer
+        return ProgramAnalyzer(self._expr_interpreter).analyze(self._program, self._line_index, self._restore_line_index,
+            self._statement_parsers, defined, functions)
+
+    def analysis(self):
+        """Resultado del análisis estático del último programa cargado (None si está desactivado)"""
+        return self._analysis
+
+    def set_tracer(self, tracer):
+        """
+        tracer: objeto que recibe cada sentencia ejecutada y cada escritura de variable
+        (ver ExecutionTrace), o None para desactivar la traza
+        """
+        if self._tracer is not None:
+            self._tracer.detach()
+        self._tracer = tracer
+        if tracer is not None:
+            tracer.attach(self)
+
     def run(self, line=0):
+        if not self._check_program():
+            return
+
+        if line != 0 and line not in self._line_index:
+            self._output.message(f"\r\nError: Undefined line number {line}")
+            return
         self._pc = 0 if line == 0 else self._line_index[line]
         self._stop = False
         self._return_stack = []
         self._data_buffer_index = 0
+        self._execute()
+
+    def continue_run(self, line=None):
+        """
+        Reanuda la ejecución donde se detuvo (CONTINUE), o desde la línea indicada (GO TO),
+        sin borrar variables ni la pila de GO SUB
+        """
+        if not self._check_program(resuming=True):
+            return
 
+        if line is not None:
+            if line not in self._line_index:
+                self._output.message(f"\r\nError: Undefined line number {line}")
+                return
+            self._pc = self._line_index[line]
+        self._stop = False
+        self._execute()
+
+    def execute_direct(self, code):
+        """Ejecuta inmediatamente una línea sin número (modo directo)"""
+        code_parts = re_split(r':(?=(?:[^"]*"[^"]*")*[^"]*$)', code)
+        # The static analysis describes the numbered statements: a direct LET must
+        # check its type whatever the program counter left by the last run
+        self._direct = True
+        try:
+            for code_part in code_parts:
+                self.execute_sentence(code_part.strip())
+        except (ValueError, RuntimeError) as re:
+            self._output.message(f"\r\nError: {re}")
+        except (KeyError, IndexError) as e:
+            self._output.message(f"\r\nError: {type(e).__name__} {e}")
+        except KeyboardInterrupt:
+            self._output.message("\r\nInterrupted")
+        finally:
+            self._direct = False
+            self._output.frame()
+
+    def clear(self):
+        """Borra las variables y las funciones definidas (como RUN o CLEAR)"""
+        self._num_variables.clear()
+        self._str_variables.clear()
+        self._functions.clear()
+
+    def _check_program(self, resuming=False):
+        if self._static_check and self._analysis is None:
+            self._analyze()
+        analysis = self._analysis
+        if resuming and analysis is not None and not analysis.is_valid():
+            # Al reanudar, las variables y funciones que ya existen cuentan como asignadas
+            functions = {name: (function.params, function.body) for name, function in self._functions.items()}
+            analysis = self._run_analyzer([*self._num_variables, *self._str_variables], functions)
+        if analysis is not None and not analysis.is_valid():
+            for error in analysis.errors:
+                self._output.message(f"\r\nError: {error}")
+            return False
+        return True
+
+    def _execute(self):
+        line_number, code = None, None
+        line_numbers, codes = self._program.line_numbers, self._program.codes
         try:
-            while not self._stop and self._pc < len(self._program):
-                line_number, _, code = self._program[self._pc]
+            while not self._stop and self._pc < len(codes):
+                line_number = line_numbers[self._pc]
+                code = codes[self._pc]
+                if self._tracer is not None:
+                    self._tracer.statement(self._pc)
                 self.execute_sentence(code)
                 self._pc += 1
             if self._stop:
-                print("\r\nProgram stop")
+                self._output.message("\r\nProgram stop")
             else:
-                print("\r\nOK")
+                self._output.message("\r\nOK")
         except (ValueError, RuntimeError) as re:
-            print(f"\r\nError: {re}\r\n\tat line {line_number} {code}")
+            self._output.message(f"\r\nError: {re}\r\n\tat line {line_number} {code}")
         except KeyboardInterrupt:
-            print("\r\nInterrupted program")
+            self._output.message("\r\nInterrupted program")
         finally:
-            print("\x1b[0m",end="")
+            if self._tracer is not None:
+                self._tracer.close()
+            self._output.reset()
 
     def execute_sentence(self, code):
         code = code.strip()
-        code_upper = code.upper()
-
-        if code_upper.startswith("PRINT"):
-            self.execute_print(code)
-
-        elif code_upper.startswith("GO TO") or code_upper.startswith("GOTO"):
-            self.execute_goto(code)
-
-        elif code_upper.startswith("LET"):
-            self.execute_let(code)
-
-        elif code_upper.startswith("IF"):
-            self.execute_if(code)
-
-        elif code_upper.startswith("INPUT"):
-            self.execute_input(code)
-
-        elif code_upper.startswith("FOR"):
-            self.execute_for(code)
-
-        elif code_upper.startswith("NEXT"):
-            self.execute_next(code)
-
-        elif code_upper.startswith("REM"):
-            self.execute_rem(code)
-
-        elif code_upper.startswith("STOP"):
-            self.execute_stop(code)
-
-        elif code_upper.startswith("GO SUB") or code_upper.startswith("GOSUB"):
-            self.execute_gosub(code)
-
-        elif code_upper.startswith("RETURN"):
-            self.execute_return(code)
-
-        elif code_upper.startswith("READ"):
-            self.execute_read(code)
-
-        elif code_upper.startswith("RESTORE"):
-            self.execute_restore(code)
-
-        elif code_upper.startswith("RANDOMIZE"):
-            self.execute_randomize(code)
-
-        elif code_upper.startswith("DEF"):
-            self.execute_def(code)
-
-        elif code_upper.startswith("CLS"):
-            self.execute_cls(code)
-
-        elif code_upper.startswith("WAIT"):
-            self.execute_wait(code)
-
-        elif code_upper.startswith("INK"):
-            self.execute_ink(code)
-
-        elif code_upper.startswith("PAPER"):
-            self.execute_paper(code)
+        execute = self._statements.get(leading_keyword(code))
+        if execute is None:
+            raise RuntimeError(f"Unknown keyword: {code}")
+        execute(code)
 
-        elif code_upper.startswith("BRIGHT"):
-            self.execute_bright(code)
+    def register_statement(self, keyword, execute, parse=None):
+        """
+        Añade una sentencia (o reemplaza una predefinida).
+
+        keyword: palabra clave con la que empieza la sentencia, p.ej. "PLOT"
+        execute: función execute(interpreter, code) que ejecuta la sentencia completa
+        parse: función parse(code) opcional para el chequeo estático; devuelve un
+            ProgramAnalyzer.ParsedStatement con las expresiones que evalúa la sentencia, las
+            variables que asigna y las líneas a las que puede saltar (o solo la lista de
+            expresiones), o lanza ValueError si es incorrecta
+        """
+        keyword = normalize_keyword(keyword)
+        self._statements[keyword] = partial(execute, self)
+        self._statement_parsers[keyword] = parse
+        self._analysis = None
+        self._expr_interpreter.set_numeric_expressions(())
+
+    def evaluate(self, expression):
+        """Evalúa una expresión con las variables y funciones actuales"""
+        return self._expr_interpreter.evaluate(expression)
+
+    def assign(self, var_name, value):
+        """Asigna un valor a una variable (de texto si su nombre termina en '$'), comprobando su tipo"""
+        if var_name.endswith("$"):
+            if not isinstance(value, str):
+                raise RuntimeError("Type mismatch. A string was expected.")
+            self._str_variables[var_name] = value
+        else:
+            if not isinstance(value, (int, float)):
+                raise RuntimeError("Type mismatch. A number was expected.")
+            self._num_variables[var_name] = value
+        self._trace_write(var_name, value)
 
-        elif code_upper.startswith("FLASH"):
-            self.execute_flash(code)
+    def jump(self, line_number):
+        """Continúa la ejecución en la línea indicada al terminar la sentencia actual (como GO TO)"""
+        if line_number not in self._line_index:
+            raise RuntimeError(f"Undefined line number {line_number}")
 
-        else:
-            raise RuntimeError(f"Unknown keyword: {code}")
+        # -1 porque el loop principal hará pc += 1
+        self._pc = self._line_index[line_number] - 1
 
     def execute_print(self, code):
         if code == "PRINT":
-            print()
+            self._output.newline()
             return
 
         _, rest = code.split(" ", 1)
@@ -168,23 +363,17 @@ class BasicInterpreter:
             if arg != "":
                 value = self._expr_interpreter.evaluate(arg)
                 if isinstance(value, (float, int)):
-                    print(f"{value:g}", end="", flush=True)
+                    self._output.write(f"{value:g}")
                 else:
-                    print(value, end="", flush=True)
+                    self._output.write(value)
 
         if not code.endswith(";"):
-            print(flush=True)
+            self._output.newline()
 
     def execute_goto(self, code):
         # GO TO 10
         parts = code.split()
-        target_line = int(parts[-1])
-
-        if target_line not in self._line_index:
-            raise RuntimeError(f"Undefined line number {target_line}")
-
-        # -1 porque el loop principal hará pc += 1
-        self._pc = self._line_index[target_line] - 1
+        self.jump(int(parts[-1]))
 
     def execute_let(self, code):
         _, rest = code.split(" ", 1)
@@ -193,18 +382,25 @@ class BasicInterpreter:
         var = var.strip()
         expr = expr.strip()
         
-        self._assignVariable(var, expr)
+        self._assignVariable(var, expr, not self._is_typed_assignment())
+
+    def _is_typed_assignment(self):
+        return not self._direct and self._analysis is not None and self._pc in self._analysis.typed_assignments
 
-    def _assignVariable(self, var_name, expression_value):
+    def _assignVariable(self, var_name, expression_value, check_type=True):
         value = self._expr_interpreter.evaluate(expression_value)
+        if check_type:
+            self.assign(var_name, value)
+            return
         if var_name.endswith("$"):
-            if not isinstance(value, str):
-                raise RuntimeError("Type mismatch. A string was expected.")
             self._str_variables[var_name] = value
         else:
-            if not isinstance(value, (int, float)):
-                raise RuntimeError("Type mismatch. A number was expected.")
             self._num_variables[var_name] = value
+        self._trace_write(var_name, value)
+
+    def _trace_write(self, var_name, value):
+        if self._tracer is not None:
+            self._tracer.variable(var_name, value)
 
     def execute_if(self, code):
 
@@ -219,18 +415,21 @@ class BasicInterpreter:
         chunks = re_split(r'[;,](?=(?:[^"]*"[^"]*")*[^"]*$)', rest)
         if len(chunks) > 2:
             raise ValueError("INPUT: Too much arguments")
-        elif len(chunks) == 2:
+        self._output.prepare_input()
+        if len(chunks) == 2:
             prompt = self._expr_interpreter.evaluate(chunks[0].strip())
             variable = chunks[1]
-            value = input(prompt)
+            value = self._input_function(prompt)
         else:
             variable = chunks[0]
-            value = input("? ")
+            value = self._input_function("? ")
         variable = variable.strip()
         if variable.endswith("$"):
             self._str_variables[variable] = value
         else:
-            self._num_variables[variable] = float(value)
+            value = parse_number(value)
+            self._num_variables[variable] = value
+        self._trace_write(variable, value)
 
     def execute_for(self, code):
         _, rest = code.split(" ", 1)
@@ -248,6 +447,7 @@ class BasicInterpreter:
         self._num_variables[f"for_end_{loop_variable}"] = self._expr_interpreter.evaluate(loop_end.strip())
         self._num_variables[f"for_step_{loop_variable}"] = self._expr_interpreter.evaluate(loop_step.strip())
         self._num_variables[f"for_num_codeline_{loop_variable}"] = self._pc
+        self._trace_write(loop_variable, self._num_variables[loop_variable])
 
         if self._num_variables[f"for_step_{loop_variable}"] == 0:
             raise ValueError("FOR STEP can not be 0.")
@@ -256,8 +456,12 @@ class BasicInterpreter:
 
         _, loop_variable = code.split(" ", 1)
         
-        step = self._num_variables[f"for_step_{loop_variable}"]
+        try:
+            step = self._num_variables[f"for_step_{loop_variable}"]
+        except KeyError:
+            raise RuntimeError(f"NEXT without FOR: {loop_variable}") from None
         self._num_variables[loop_variable] += step
+        self._trace_write(loop_variable, self._num_variables[loop_variable])
         if (step > 0 and self._num_variables[loop_variable] <= self._num_variables[f"for_end_{loop_variable}"]) \
             or ( step < 0 and self._num_variables[loop_variable] >= self._num_variables[f"for_end_{loop_variable}"]):
             self._pc = self._num_variables[f"for_num_codeline_{loop_variable}"]
@@ -269,22 +473,25 @@ class BasicInterpreter:
         self._stop = True
 
     def execute_gosub(self, code):
-        self._return_stack.append(self._pc)
         parts = code.split()
         target_line = int(parts[-1])
+        if target_line not in self._line_index:
+            raise RuntimeError(f"Undefined line number {target_line}")
+        self._return_stack.append(self._pc)
         self._pc = self._line_index[target_line] - 1
 
     def execute_return(self, code):
+        if not self._return_stack:
+            raise RuntimeError("RETURN without GO SUB")
         self._pc = self._return_stack.pop()
 
     def execute_data(self, line_number, code):
-        if not line_number in self._restore_line_index:
-            self._restore_line_index[line_number] = len(self._data_buffer)
+        data_line = self._data_lines.setdefault(line_number, [])
 
         _, row_data = code.split(" ", 1)        
         for data_element in row_data.split(","):
-            data_element = data_element.strip()
-            self._data_buffer.append(data_element)
+            data_element = intern(data_element.strip())     # los valores repetidos comparten el string
+            data_line.append(data_element)
 
     def execute_read(self, code):
         _, params = code.split(" ", 1)
@@ -299,57 +506,55 @@ class BasicInterpreter:
 
     def execute_restore(self, code):
         items = code.split(" ")        
+        if len(items) > 1 and int(items[-1]) not in self._restore_line_index:
+            raise RuntimeError(f"Undefined DATA line number {items[-1]}")
         self._data_buffer_index = self._restore_line_index[int(items[-1])] if len(items) > 1 else 0
 
     def execute_randomize(self, code):
         seed()
 
     def execute_def(self, code):
-        _, function = code.split("FN")
-        header, body = function.strip().split("=")
+        _, function = code.split("FN", 1)
+        header, body = function.strip().split("=", 1)
         name_raw, params_raw = header.strip().split("(")
-        name = name_raw.strip()
-        params = [p.strip() for p in params_raw.strip()[:-1].split(",")]
+        name = intern(name_raw.strip())
+        params = [intern(p.strip()) for p in params_raw.strip()[:-1].split(",")]
         return_type = ValueType.String if name[-1] == '$' else ValueType.Integer
         
-        definition = FunctionDefinition(return_type, params, body.strip())
+        definition = FunctionDefinition(return_type, params, body.strip(), self._fn_cache_size)
+        for function in self._functions.values():
+            function.invalidate()
         self._functions[name] = definition
 
+    def function_cache_stats(self):
+        """Aciertos y fallos de la caché de cada función FN: {nombre: (hits, misses)}"""
+        return {name: (function.hits, function.misses) for name, function in self._functions.items()}
+
     def execute_cls(self, code):
-        print("\x1b[2J\x1b[H", end="")
+        self._output.cls()
 
     def execute_wait(self, code):
         _, param = code.split(" ", 1)
         seconds = self._expr_interpreter.evaluate(param.strip())
         if not isinstance(seconds, (float, int)):
             raise ValueError("WAIT: Number expected as parameter")
+        self._output.frame()
         sleep(seconds)
 
-    def _apply_ink_color(self):
-        print(f"\x1b[{(90 if self._bright else 30) + BasicInterpreter._ansi_colors[self._ink_color]}m", end="")
-
     def execute_ink(self, code):
         _, param = code.split(" ", 1)
-        self._ink_color = int(self._expr_interpreter.evaluate(param.strip()))   
-        self._apply_ink_color()     
-
-    def _apply_paper_color(self):
-        print(f"\x1b[{(100 if self._bright else 40) + BasicInterpreter._ansi_colors[self._paper_color]}m", end="")
+        self._output.set_ink(int(self._expr_interpreter.evaluate(param.strip())))
 
     def execute_paper(self, code):
         _, param = code.split(" ", 1)
-        self._paper_color = int(self._expr_interpreter.evaluate(param.strip()))
-        self._apply_paper_color()
+        self._output.set_paper(int(self._expr_interpreter.evaluate(param.strip())))
 
     def execute_bright(self, code):
         _, param = code.split(" ", 1)
         value = int(self._expr_interpreter.evaluate(param.strip()))
-        self._bright = value == 1
-        self._apply_ink_color()
-        self._apply_paper_color()
+        self._output.set_bright(value == 1)
         
     def execute_flash(self, code):
         _, param = code.split(" ", 1)
         value = self._expr_interpreter.evaluate(param.strip())
-        print(f"\x1b[{5 if value == 1 else 25}m", end="")
-        
\ No newline at end of file
+        self._output.set_flash(value == 1)
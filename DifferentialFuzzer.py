@@ -0,0 +1,671 @@
+import argparse
+import contextlib
+import io
+import math
+import os
+import random
+import re
+import sys
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from BasicInterpreter import BasicInterpreter
+from ExecutionTrace import TraceRecorder, TraceReplayer
+from ExpressionInterpreter import ExpressionInterpreter, OPERATORS, parse_number
+from FunctionDefinition import FunctionDefinition
+from ProgramAnalyzer import ProgramAnalyzer
+from TerminalOutput import ScreenRenderer
+from ValueType import ValueType
+
+# Differential testing: random well-typed expressions and small programs are
+# generated from the operator table and run on every engine and optimisation
+# level. Any disagreement is shrunk to a minimal reproducer.
+#
+#   expressions  reference evaluation of the generated tree, the generic evaluator,
+#                the numeric fast path (when the static check proves the expression
+#                numeric), the static type and the FN cache on and off
+#   programs     static check off and on, FN cache off and on, trace record and
+#                replay, and the screen renderer against the plain terminal text
+
+NUMERIC_VARIABLES = {"a": 3, "b": 7, "c": 2.5, "d": 0}
+STRING_VARIABLES = {"a$": "HELLO", "b$": "", "c$": 'say "hi"'}
+
+# DEF FN definitions and their Python counterparts, used by the reference evaluation
+FUNCTIONS = {
+    "f": (["x"], "x * 2 + 1", lambda x: x * 2 + 1),
+    "g$": (["s$"], 's$ + "!"', lambda s: s + "!"),
+    "h": (["x", "y"], "x - y * 2", lambda x, y: x - y * 2),
+}
+
+_UNARY_NUMERIC = [key for key, op in OPERATORS.items()
+    if op.nparams == 1 and key not in ("STR$", "LEN", "VAL", "TAB", "NEG", "NOT")]
+_ARITHMETIC = ("^", "*", "/", "+", "-")
+_LOGICAL = ("AND", "OR", "NOR")
+_COMPARISONS = [key for key, op in OPERATORS.items() if op.precedence == 2]
+_ATOM = 99      # precedence of the nodes that never need parentheses
+
+# kind: "num" or "str"; tag: "lit", "var", "fn" or "op"; text: literal text, variable,
+# function name or operator key; value: literal value
+_Node = namedtuple("_Node", "kind tag text value children")
+
+_ONE = _Node("num", "lit", "1", 1, ())
+_EMPTY = _Node("str", "lit", '"a"', "a", ())
+
+
+# ----------------------------------------------------------------------
+# Expression generation
+# ----------------------------------------------------------------------
+
+def _number(rng):
+    if rng.random() < 0.2:
+        value = rng.choice((0.5, 1.5, 2.25, 10.75))
+        return _Node("num", "lit", str(value), value, ())
+    return _integer(rng.randint(0, 20))
+
+
+def _integer(value):
+    return _Node("num", "lit", str(value), value, ())
+
+
+def _string(rng):
+    value = "".join(rng.choice('AB c"') for _ in range(rng.randint(0, 4)))
+    return _Node("str", "lit", '"' + value.replace('"', '""') + '"', value, ())
+
+
+def _atom(rng, kind, variables=True):
+    if variables and rng.random() < 0.4:
+        names = NUMERIC_VARIABLES if kind == "num" else STRING_VARIABLES
+        return _Node(kind, "var", rng.choice(sorted(names)), None, ())
+    return _number(rng) if kind == "num" else _string(rng)
+
+
+def _op(kind, key, *children):
+    return _Node(kind, "op", key, None, children)
+
+
+def generate(rng, kind="num", depth=4):
+    """Random well-typed expression tree of the given kind"""
+    if depth == 0 or rng.random() < 0.25:
+        return _atom(rng, kind)
+    depth -= 1
+
+    if kind == "str":
+        choice = rng.random()
+        if choice < 0.35:
+            return _op("str", "+", generate(rng, "str", depth), generate(rng, "str", depth))
+        if choice < 0.5:
+            count = _integer(rng.randint(0, 3))
+            if rng.random() < 0.5:
+                return _op("str", "*", generate(rng, "str", depth), count)
+            return _op("str", "*", count, generate(rng, "str", depth))
+        if choice < 0.65:
+            return _op("str", "STR$", generate(rng, "num", depth))
+        if choice < 0.85:
+            start, end = _integer(rng.randint(1, 4)), _integer(rng.randint(0, 5))
+            key = rng.choice(("TO", "START_TO", "TO_END"))
+            bounds = {"TO": (start, end), "START_TO": (end,), "TO_END": (start,)}[key]
+            return _op("str", key, generate(rng, "str", depth), *bounds)
+        return _Node("str", "fn", "g$", None, (_atom(rng, "str"),))
+
+    choice = rng.random()
+    if choice < 0.4:
+        key = rng.choice(_ARITHMETIC)
+        if key == "^":
+            return _op("num", "^", generate(rng, "num", depth), _integer(rng.randint(0, 3)))
+        return _op("num", key, generate(rng, "num", depth), generate(rng, "num", depth))
+    if choice < 0.5:
+        operand_kind = rng.choice(("num", "str"))
+        return _op("num", rng.choice(_COMPARISONS), generate(rng, operand_kind, depth), generate(rng, operand_kind, depth))
+    if choice < 0.55:
+        return _op("num", rng.choice(_LOGICAL), generate(rng, "num", depth), generate(rng, "num", depth))
+    if choice < 0.7:
+        return _op("num", rng.choice(_UNARY_NUMERIC), generate(rng, "num", depth))
+    if choice < 0.75:
+        return _op("num", rng.choice(("NEG", "NOT")), generate(rng, "num", depth))
+    if choice < 0.8:
+        return _op("num", "LEN", generate(rng, "str", depth))
+    if choice < 0.85:
+        value = rng.randint(0, 99)
+        return _op("num", "VAL", _Node("str", "lit", f'"{value}"', str(value), ()))
+    if choice < 0.9:
+        return _op("num", rng.choice(("PI", "RND")))
+    # The tokenizer ends the FN parameters at the first ')', so they are kept atomic
+    name = rng.choice(("f", "h"))
+    return _Node("num", "fn", name, None, tuple(_atom(rng, "num") for _ in FUNCTIONS[name][0]))
+
+
+# ----------------------------------------------------------------------
+# Rendering
+# ----------------------------------------------------------------------
+
+def _precedence(node):
+    if node.tag != "op" or node.text in ("NEG", "TO", "START_TO", "TO_END") or OPERATORS[node.text].nparams == 0:
+        return _ATOM
+    return OPERATORS[node.text].precedence
+
+
+def _wrap(node, parentheses):
+    text = render(node)
+    return f"({text})" if parentheses else text
+
+
+def render(node):
+    """SBasic source of the expression tree, with the parentheses its precedence needs"""
+    if node.tag in ("lit", "var"):
+        return node.text
+    if node.tag == "fn":
+        return f"FN {node.text}({', '.join(render(arg) for arg in node.children)})"
+
+    key = node.text
+    operator = OPERATORS[key]
+    if key == "NEG":
+        child = node.children[0]
+        return f"(-{_wrap(child, _precedence(child) < operator.precedence)})"
+    if key in ("TO", "START_TO", "TO_END"):
+        string, *bounds = node.children
+        text = _wrap(string, string.tag not in ("lit", "var"))
+        if key == "TO":
+            return f"{text}({render(bounds[0])} TO {render(bounds[1])})"
+        if key == "START_TO":
+            return f"{text}(TO {render(bounds[0])})"
+        return f"{text}({render(bounds[0])} TO)"
+    if operator.nparams == 0:
+        return key
+    if operator.nparams == 1:
+        child = node.children[0]
+        return f"{key} {_wrap(child, _precedence(child) < operator.precedence)}"
+    left, right = node.children
+    return (f"{_wrap(left, _precedence(left) < operator.precedence)} {key} "
+        f"{_wrap(right, _precedence(right) <= operator.precedence)}")
+
+
+# ----------------------------------------------------------------------
+# Reference evaluation
+# ----------------------------------------------------------------------
+
+def reference(node, draw):
+    """Value of the expression tree computed directly from the operator functions"""
+    if node.tag == "lit":
+        return node.value
+    if node.tag == "var":
+        return NUMERIC_VARIABLES[node.text] if node.kind == "num" else STRING_VARIABLES[node.text]
+    if node.tag == "fn":
+        return FUNCTIONS[node.text][2](*(reference(arg, draw) for arg in node.children))
+
+    key = node.text
+    if key == "RND":
+        return draw()
+    values = [reference(child, draw) for child in node.children]
+    if key == "VAL":
+        return parse_number(values[0])
+    if key in ("TO", "START_TO", "TO_END"):
+        return OPERATORS[key].func(values[0], *(int(v) for v in values[1:]))
+    if key == "*" and node.kind == "str":
+        left, right = values
+        return left * int(right) if isinstance(left, str) else right * int(left)
+    return OPERATORS[key].func(*values)
+
+
+# ----------------------------------------------------------------------
+# Engines
+# ----------------------------------------------------------------------
+
+def _draws():
+    return random.Random(1234).random
+
+
+def _outcome(function):
+    """('ok', type, value), ('error',) for BASIC errors or ('crash', exception type)"""
+    try:
+        value = function()
+    except (ValueError, RuntimeError):
+        return ("error",)
+    except Exception as e:
+        return ("crash", type(e).__name__)
+    if isinstance(value, float) and math.isnan(value):
+        value = "nan"
+    return ("ok", type(value).__name__, value)
+
+
+def _functions(cache_size):
+    return {name: FunctionDefinition(ValueType.String if name.endswith("$") else ValueType.Integer, params, body, cache_size)
+        for name, (params, body, _) in FUNCTIONS.items()}
+
+
+def _expression_interpreter(cache_size=0):
+    interpreter = ExpressionInterpreter(dict(NUMERIC_VARIABLES), dict(STRING_VARIABLES), _functions(cache_size))
+    interpreter._random = _draws()
+    return interpreter
+
+
+_ANALYSIS_PREFIX = ([f"LET {name} = {value!r}" for name, value in NUMERIC_VARIABLES.items()]
+    + [f'LET {name} = "{value.replace(chr(34), chr(34) * 2)}"' for name, value in STRING_VARIABLES.items()]
+    + [f"DEF FN {name}({', '.join(params)}) = {body}" for name, (params, body, _) in FUNCTIONS.items()])
+
+
+def _analyze(text):
+    program = [(10 * (idx + 1), 0, code) for idx, code in enumerate(_ANALYSIS_PREFIX + [f"PRINT {text}"])]
+    line_index = {line_number: idx for idx, (line_number, _, _) in enumerate(program)}
+    return ProgramAnalyzer().analyze(program, line_index, {})
+
+
+def _type_agrees(value_type, outcome):
+    if outcome[0] != "ok" or value_type is None:
+        return True
+    return (outcome[1] == "str") == (value_type == ValueType.String)
+
+
+def run_expression(node):
+    """{engine: outcome} of the expression on every engine"""
+    text = render(node)
+    outcomes = {}
+    reference_outcome = _outcome(lambda: reference(node, _draws()))
+    outcomes["reference"] = ("error",) if reference_outcome[0] == "crash" else reference_outcome
+    outcomes["generic"] = _outcome(lambda: _expression_interpreter().evaluate(text))
+
+    analysis = _analyze(text)
+    if analysis.errors:
+        outcomes["static"] = ("rejected", str(analysis.errors[0]).split("\r\n")[0])
+    else:
+        value_type = analysis.expression_types.get(text)
+        outcomes["static"] = outcomes["generic"] if _type_agrees(value_type, outcomes["generic"]) \
+            else ("type", value_type.name)
+    if text in analysis.numeric_expressions:
+        def numeric():
+            interpreter = _expression_interpreter()
+            interpreter.set_numeric_expressions((text,))
+            return interpreter.evaluate(text)
+        outcomes["numeric"] = _outcome(numeric)
+
+    if "FN" in text:
+        def cached():
+            interpreter = _expression_interpreter(cache_size=256)
+            interpreter.evaluate(text)
+            interpreter._random = _draws()
+            return interpreter.evaluate(text)
+        outcomes["fn-cache"] = _outcome(cached)
+    return outcomes
+
+
+# ----------------------------------------------------------------------
+# Programs
+# ----------------------------------------------------------------------
+
+_LOOP_VARIABLES = ("i", "j")
+
+
+def _program_expression(rng, kind, loop_variables):
+    """Shallow expression without '^', so that loops cannot make numbers explode"""
+    node = generate(rng, kind, depth=2)
+    while any(n.tag == "op" and n.text == "^" for n in _walk(node)):
+        node = generate(rng, kind, depth=2)
+    if kind == "num" and loop_variables and rng.random() < 0.4:
+        node = _op("num", "+", node, _Node("num", "var", rng.choice(loop_variables), None, ()))
+    return render(node)
+
+
+def _statements(rng, count, loop_variables, subroutines):
+    statements = []
+    for _ in range(count):
+        choice = rng.random()
+        if choice < 0.03:
+            # Exact integers beyond 64 bits, written to the watched variables of the trace
+            name = rng.choice(sorted(NUMERIC_VARIABLES))
+            statements.append(f"LET {name} = {rng.choice(('', '0 - '))}2 ^ {rng.choice((62, 63, 64, 100))}")
+        elif choice < 0.25:
+            name = rng.choice(sorted(NUMERIC_VARIABLES))
+            statements.append(f"LET {name} = {_program_expression(rng, 'num', loop_variables)}")
+        elif choice < 0.35:
+            name = rng.choice(sorted(STRING_VARIABLES))
+            statements.append(f"LET {name} = {_program_expression(rng, 'str', loop_variables)}")
+        elif choice < 0.6:
+            items = [_program_expression(rng, rng.choice(("num", "str")), loop_variables) for _ in range(rng.randint(1, 3))]
+            if rng.random() < 0.2:
+                items.insert(rng.randint(0, len(items)), f"TAB {rng.randint(0, 34)}")
+            if rng.random() < 0.2:
+                items.insert(0, f"AT {rng.randint(0, 26)},{rng.randint(0, 34)}")
+            statements.append("PRINT " + "; ".join(items) + (";" if rng.random() < 0.3 else ""))
+        elif choice < 0.7:
+            condition = render(_op("num", rng.choice(_COMPARISONS), generate(rng, "num", 1), generate(rng, "num", 1)))
+            then = f"PRINT {_program_expression(rng, 'str', loop_variables)}" if rng.random() < 0.5 \
+                else f"LET d = {_program_expression(rng, 'num', loop_variables)}"
+            statements.append(f"IF {condition} THEN {then}")
+        elif choice < 0.85 and len(loop_variables) < len(_LOOP_VARIABLES):
+            variable = _LOOP_VARIABLES[len(loop_variables)]
+            step = rng.choice(("", " STEP 2", " STEP -1"))
+            start, end = (3, 1) if step == " STEP -1" else (1, rng.randint(1, 3))
+            statements.append(f"FOR {variable} = {start} TO {end}{step}")
+            statements += _statements(rng, rng.randint(1, 3), loop_variables + (variable,), subroutines)
+            statements.append(f"NEXT {variable}")
+        elif choice < 0.92 and subroutines:
+            statements.append(f"GO SUB @{rng.randrange(subroutines)}")
+        elif choice < 0.96:
+            statements.append(f"INPUT {rng.choice(sorted(NUMERIC_VARIABLES))}")
+        else:
+            statements.append(f"READ {rng.choice(sorted(NUMERIC_VARIABLES))}")
+    return statements
+
+
+def generate_program(rng):
+    """Random valid program, as a list of numbered source lines"""
+    subroutine_count = rng.randint(0, 2)
+    blocks = [[f"LET {name} = {value!r}" for name, value in NUMERIC_VARIABLES.items()]
+        + [f'LET {name} = "{value.replace(chr(34), chr(34) * 2)}"' for name, value in STRING_VARIABLES.items()],
+        [f"DEF FN {name}({', '.join(params)}) = {body}" for name, (params, body, _) in FUNCTIONS.items()],
+        _statements(rng, rng.randint(2, 10), (), subroutine_count),
+        ["STOP"]]
+    # Every subroutine is called: the static check links each NEXT to all the FOR of its
+    # variable, so an uncalled subroutine may look reachable and be rejected
+    for idx in range(subroutine_count):
+        blocks[2].insert(rng.randint(0, len(blocks[2])), f"GO SUB @{idx}")
+    for _ in range(subroutine_count):
+        blocks.append(_statements(rng, rng.randint(1, 3), (), 0) + ["RETURN"])
+    blocks.append(["DATA " + ", ".join(str(rng.randint(0, 9)) for _ in range(8))])
+
+    # One line per statement, or a few statements per line joined with ':'
+    lines, starts = [], []
+    for block in blocks:
+        starts.append(len(lines))
+        idx = 0
+        while idx < len(block):
+            size = rng.choice((1, 1, 2, 3)) if not block[idx].startswith("DATA") else 1
+            lines.append(" : ".join(block[idx:idx + size]))
+            idx += size
+    numbers = [10 * (idx + 1) for idx in range(len(lines))]
+    subroutine_lines = [numbers[start] for start in starts[4:4 + subroutine_count]]
+    return [f"{number} {_resolve_subroutines(line, subroutine_lines)}" for number, line in zip(numbers, lines)]
+
+
+def _resolve_subroutines(line, subroutine_lines):
+    for idx, number in enumerate(subroutine_lines):
+        line = line.replace(f"@{idx}", str(number))
+    return line
+
+
+class _CapturedOutput:
+    """Output of BasicInterpreter kept as plain text"""
+
+    def __init__(self):
+        self.text = []
+        self.messages = []
+
+    def write(self, text):
+        self.text.append(text)
+
+    def newline(self):
+        self.text.append("\n")
+
+    def message(self, text):
+        self.messages.append(text)
+
+    def cls(self): pass
+    def set_ink(self, color): pass
+    def set_paper(self, color): pass
+    def set_bright(self, bright): pass
+    def set_flash(self, flash): pass
+    def frame(self): pass
+    def prepare_input(self): pass
+    def reset(self): pass
+
+
+def _inputs():
+    values = iter(["4", "2.5", "7", "0"] * 25)
+    return lambda prompt: next(values)
+
+
+def _run_program(lines, static_check, fn_cache_size, output=None, tracer=None, replayer=None):
+    output = output if output is not None else _CapturedOutput()
+    interpreter = BasicInterpreter(static_check=static_check, output=output, fn_cache_size=fn_cache_size)
+    interpreter._expr_interpreter._random = _draws()
+    interpreter._input_function = _inputs()
+    with contextlib.redirect_stdout(io.StringIO()):
+        interpreter.load(lines)
+        if replayer is not None:
+            replayer.replay(interpreter)
+        else:
+            if tracer is not None:
+                interpreter.set_tracer(tracer)
+            interpreter.run()
+    return interpreter, output
+
+
+def _program_outcome(function):
+    try:
+        interpreter, output = function()
+    except Exception as e:
+        return ("crash", type(e).__name__)
+    analysis = interpreter.analysis()
+    if analysis is not None and analysis.errors:
+        return ("rejected", str(analysis.errors[0]).split("\r\n")[0])
+    variables = {name: value for name, value in interpreter._num_variables.items() if not name.startswith("for_")}
+    return ("ok", "".join(output.text), tuple(output.messages),
+        tuple(sorted(variables.items())), tuple(sorted(interpreter._str_variables.items())))
+
+
+def _screen_lines(text):
+    """
+    What a 24x32 terminal shows after printing text, whose AT and TAB codes are
+    1-based cursor moves clamped to the screen
+    """
+    rows, columns = ScreenRenderer.ROWS, ScreenRenderer.COLUMNS
+    screen = [[" "] * columns for _ in range(rows)]
+    row = column = 0
+    for part in re.split(r"(\x1b\[[\d.;]*[fG]|\n)", text):
+        if part.startswith("\x1b"):
+            positions, code = part[2:-1].split(";"), part[-1]
+            clamped = [min(max(int(float(position)), 1), size) - 1
+                for position, size in zip(positions, (rows, columns) if code == "f" else (columns,))]
+            if code == "f":
+                row, column = clamped
+            else:
+                column, = clamped
+            continue
+        for char in part:
+            if char == "\n" or column == columns:
+                row, column = row + 1, 0
+                if row == rows:
+                    screen = screen[1:] + [[" "] * columns]
+                    row -= 1
+                if char == "\n":
+                    continue
+            screen[row][column] = char
+            column += 1
+    return ["".join(line) for line in screen]
+
+
+def run_program(lines):
+    """{engine: outcome} of the program on every engine"""
+    outcomes = {
+        "plain": _program_outcome(lambda: _run_program(lines, False, 0)),
+        "checked": _program_outcome(lambda: _run_program(lines, True, 0)),
+        "cached": _program_outcome(lambda: _run_program(lines, True, 256)),
+    }
+
+    def replayed():
+        log = io.BytesIO()
+        _run_program(lines, False, 0, tracer=TraceRecorder(log, watch=NUMERIC_VARIABLES.keys()))
+        log.seek(0)
+        return _run_program(lines, False, 0, replayer=TraceReplayer(log))
+    outcomes["replayed"] = _program_outcome(replayed)
+    if outcomes["replayed"][0] == "ok" and outcomes["plain"][0] == "ok":
+        # The replayer stops before the final message: compare the rest
+        outcomes["replayed"] = outcomes["replayed"][:2] + outcomes["plain"][2:3] + outcomes["replayed"][3:]
+
+    if outcomes["plain"][0] == "ok":
+        def screen():
+            renderer = ScreenRenderer(io.StringIO())
+            _run_program(lines, False, 0, output=renderer)
+            return renderer.lines()
+        expected = _screen_lines(outcomes["plain"][1])
+        try:
+            outcomes["screen"] = outcomes["plain"] if screen() == expected else ("screen", "differs")
+        except Exception as e:
+            outcomes["screen"] = ("crash", type(e).__name__)
+    return outcomes
+
+
+# ----------------------------------------------------------------------
+# Divergences and shrinking
+# ----------------------------------------------------------------------
+
+def signature(outcomes):
+    """
+    (engine, outcome status) of the engines that disagree with the first one, and of
+    the first one, or None when all agree. Shrinking keeps the signature, so that a
+    reproducer fails in the same way as the original case.
+    """
+    first, expected = next(iter(outcomes.items()))
+    disagreeing = [engine for engine, outcome in outcomes.items()
+        if not _same(outcome, expected) or outcome[0] == "crash"]
+    if not disagreeing:
+        return None
+    return tuple((engine, outcomes[engine][0]) for engine in [first] + sorted(set(disagreeing) - {first}))
+
+
+def _same(outcome, expected):
+    if outcome[0] == "error" or expected[0] == "error":
+        return outcome[0] == expected[0]
+    return outcome == expected
+
+
+def _walk(node):
+    yield node
+    for child in node.children:
+        yield from _walk(child)
+
+
+def _simplifications(node):
+    """Smaller trees of the same kind: a child instead of the node, or an atom"""
+    if node.tag in ("lit", "var"):
+        if node != _ONE and node != _EMPTY:
+            yield _ONE if node.kind == "num" else _EMPTY
+        return
+    for child in node.children:
+        if child.kind == node.kind:
+            yield child
+    yield _ONE if node.kind == "num" else _EMPTY
+    if node.tag == "fn" or node.text in ("VAL", "^"):
+        return      # their operands have a restricted form
+    for idx, child in enumerate(node.children):
+        for smaller in _simplifications(child):
+            yield node._replace(children=node.children[:idx] + (smaller,) + node.children[idx + 1:])
+
+
+def shrink_expression(node, target):
+    progress = True
+    while progress:
+        progress = False
+        for candidate in _simplifications(node):
+            if signature(run_expression(candidate)) == target:
+                node = candidate
+                progress = True
+                break
+    return node
+
+
+def shrink_program(lines, target):
+    progress = True
+    while progress:
+        progress = False
+        for idx in range(len(lines) - 1, -1, -1):
+            candidate = lines[:idx] + lines[idx + 1:]
+            if signature(run_program(candidate)) == target:
+                lines = candidate
+                progress = True
+                break
+    return lines
+
+
+def run_case(case_seed, program_ratio, shrink=True):
+    """Runs one generated case; returns a divergence report or None"""
+    rng = random.Random(case_seed)
+    if rng.random() < program_ratio:
+        lines = generate_program(rng)
+        outcomes = run_program(lines)
+        target = signature(outcomes)
+        if target is None:
+            return None
+        reproducer = shrink_program(lines, target) if shrink else lines
+        return {"seed": case_seed, "kind": "program", "engines": target,
+            "reproducer": "\n".join(reproducer), "outcomes": run_program(reproducer)}
+
+    node = generate(rng, rng.choice(("num", "str")))
+    outcomes = run_expression(node)
+    target = signature(outcomes)
+    if target is None:
+        return None
+    reproducer = shrink_expression(node, target) if shrink else node
+    return {"seed": case_seed, "kind": "expression", "engines": target,
+        "reproducer": render(reproducer), "outcomes": run_expression(reproducer)}
+
+
+def _run_batch(batch):
+    first_seed, count, program_ratio, shrink = batch
+    reports = []
+    for case_seed in range(first_seed, first_seed + count):
+        report = run_case(case_seed, program_ratio, shrink)
+        if report is not None:
+            reports.append(report)
+    return count, reports
+
+
+def fuzz(cases, seed=0, workers=None, batch_size=500, program_ratio=0.1, shrink=True):
+    """Runs the cases in a process pool; returns (cases run, divergence reports)"""
+    batches = [(seed + start, min(batch_size, cases - start), program_ratio, shrink)
+        for start in range(0, cases, batch_size)]
+    total, reports = 0, []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for count, batch_reports in executor.map(_run_batch, batches):
+            total += count
+            reports += batch_reports
+    return total, reports
+
+
+def _print_report(report):
+    engines = ", ".join(f"{engine} ({status})" for engine, status in report["engines"])
+    print(f"\n{report['kind']} seed {report['seed']}: {engines}")
+    print(report["reproducer"])
+    for engine, outcome in report["outcomes"].items():
+        print(f"  {engine:10} {outcome!r}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SBasic differential fuzzer")
+    parser.add_argument("--cases", type=int, default=100000, help="Number of generated cases")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the first case")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Worker processes")
+    parser.add_argument("--batch", type=int, default=500, help="Cases per task sent to a worker")
+    parser.add_argument("--programs", type=float, default=0.1, help="Fraction of cases that are whole programs")
+    parser.add_argument("--no-shrink", action="store_true", help="Report the divergent cases as generated")
+    parser.add_argument("--max-reports", type=int, default=10, help="Divergences printed")
+    parser.add_argument("--case", type=int, help="Run only this case seed and print its outcomes")
+    args = parser.parse_args()
+
+    if args.case is not None:
+        rng = random.Random(args.case)
+        if rng.random() < args.programs:
+            lines = generate_program(rng)
+            print("\n".join(lines))
+            outcomes = run_program(lines)
+        else:
+            node = generate(rng, rng.choice(("num", "str")))
+            print(render(node))
+            outcomes = run_expression(node)
+        for engine, outcome in outcomes.items():
+            print(f"  {engine:10} {outcome!r}")
+        sys.exit(0 if signature(outcomes) is None else 1)
+
+    start = time.perf_counter()
+    total, reports = fuzz(args.cases, args.seed, args.workers, args.batch, args.programs, not args.no_shrink)
+    elapsed = time.perf_counter() - start
+
+    for report in reports[:args.max_reports]:
+        _print_report(report)
+    print(f"\n{total} cases, {len(reports)} divergences, {total / elapsed:.0f} cases/s "
+        f"({total / elapsed * 3600 / 1e6:.1f} million per hour)")
+    sys.exit(1 if reports else 0)
+
+
+if __name__ == "__main__":
+    main()
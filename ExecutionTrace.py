@@ -0,0 +1,323 @@
+from struct import pack, unpack
+from zlib import crc32
+
+# Trace log layout
+#
+#   header: MAGIC, VERSION, crc32 of the program (uint32), watched variable names
+#   records: one tag byte followed by its payload
+#
+#   _STEP    varint n      n statements, each one right after the previous one
+#   _JUMP    varint index  one statement at an arbitrary program index
+#   _RND     double        value returned by RND
+#   _INPUT   string        text typed at an INPUT prompt
+#   _WRITE   string value  write of a watched variable
+#
+# Sequential statements are run-length encoded, so a long run costs a few bytes
+# per jump plus the RND draws and the INPUT values.
+
+MAGIC = b"SBTR"
+VERSION = 1
+
+_STEP = 1
+_JUMP = 2
+_RND = 3
+_INPUT = 4
+_WRITE = 5
+
+_VALUE_INT = 0
+_VALUE_FLOAT = 1
+_VALUE_STRING = 2
+
+
+def program_checksum(program):
+    """CRC32 of the loaded program, used to check that a trace belongs to it"""
+    checksum = 0
+    for line_number, part_index, code in program:
+        checksum = crc32(f"{line_number}:{part_index}:{code}\n".encode(), checksum)
+    return checksum
+
+
+def _restore(interpreter, draw, read_input):
+    """Puts back the RND and INPUT sources that a tracer replaced in attach"""
+    interpreter._expr_interpreter._random = draw
+    interpreter._input_function = read_input
+
+
+class _Writer:
+
+    def __init__(self, stream):
+        self._stream = stream
+
+    def byte(self, value):
+        self._stream.write(bytes((value,)))
+
+    def varint(self, value):
+        out = bytearray()
+        while True:
+            chunk = value & 0x7f
+            value >>= 7
+            if value:
+                out.append(chunk | 0x80)
+            else:
+                out.append(chunk)
+                break
+        self._stream.write(out)
+
+    def double(self, value):
+        self._stream.write(pack("<d", value))
+
+    def string(self, value):
+        data = value.encode()
+        self.varint(len(data))
+        self._stream.write(data)
+
+    def value(self, value):
+        if isinstance(value, str):
+            self.byte(_VALUE_STRING)
+            self.string(value)
+        elif isinstance(value, float):
+            self.byte(_VALUE_FLOAT)
+            self.double(value)
+        else:
+            self.byte(_VALUE_INT)
+            self.varint(value << 1 if value >= 0 else (-value << 1) - 1)  # zigzag, any size
+
+
+class _Reader:
+
+    def __init__(self, stream):
+        self._stream = stream
+
+    def _read(self, size):
+        data = self._stream.read(size)
+        if len(data) != size:
+            raise ValueError("Truncated trace log")
+        return data
+
+    def byte(self):
+        data = self._stream.read(1)
+        return data[0] if data else None
+
+    def varint(self):
+        result = 0
+        shift = 0
+        while True:
+            chunk = self._read(1)[0]
+            result |= (chunk & 0x7f) << shift
+            if not chunk & 0x80:
+                return result
+            shift += 7
+
+    def double(self):
+        return unpack("<d", self._read(8))[0]
+
+    def string(self):
+        return self._read(self.varint()).decode()
+
+    def value(self):
+        value_type = self._read(1)[0]
+        if value_type == _VALUE_STRING:
+            return self.string()
+        if value_type == _VALUE_FLOAT:
+            return self.double()
+        encoded = self.varint()
+        return (encoded >> 1) ^ -(encoded & 1)
+
+
+class TraceRecorder:
+    """
+    Records an execution into a compact binary log: the executed program
+    indexes, every RND draw, every INPUT value and the writes of the selected
+    variables.
+    """
+
+    def __init__(self, stream, watch=()):
+        """
+        stream: binary stream opened for writing
+        watch: names of the variables whose writes are recorded
+        """
+        self._writer = _Writer(stream)
+        self._stream = stream
+        self._watch = frozenset(watch)
+        self._last_pc = -1
+        self._pending_steps = 0
+
+    def attach(self, interpreter):
+        writer = self._writer
+        self._stream.write(MAGIC)
+        writer.byte(VERSION)
+        self._stream.write(pack("<I", program_checksum(interpreter._program)))
+        writer.varint(len(self._watch))
+        for name in sorted(self._watch):
+            writer.string(name)
+
+        expr_interpreter = interpreter._expr_interpreter
+        draw = expr_interpreter._random
+        read_input = interpreter._input_function
+        self._detached = (interpreter, draw, read_input)
+
+        def recorded_random():
+            value = draw()
+            self._flush_steps()
+            writer.byte(_RND)
+            writer.double(value)
+            return value
+
+        def recorded_input(prompt):
+            value = read_input(prompt)
+            self._flush_steps()
+            writer.byte(_INPUT)
+            writer.string(value)
+            return value
+
+        expr_interpreter._random = recorded_random
+        interpreter._input_function = recorded_input
+
+    def detach(self):
+        _restore(*self._detached)
+
+    def statement(self, pc):
+        if pc == self._last_pc + 1:
+            self._pending_steps += 1
+        else:
+            self._flush_steps()
+            self._writer.byte(_JUMP)
+            self._writer.varint(pc)
+        self._last_pc = pc
+
+    def variable(self, name, value):
+        if name in self._watch:
+            self._flush_steps()
+            self._writer.byte(_WRITE)
+            self._writer.string(name)
+            self._writer.value(value)
+
+    def close(self):
+        self._flush_steps()
+        self._stream.flush()
+
+    def _flush_steps(self):
+        if self._pending_steps:
+            self._writer.byte(_STEP)
+            self._writer.varint(self._pending_steps)
+            self._pending_steps = 0
+
+
+class _ReplayStop(Exception):
+    pass
+
+
+class TraceReplayer:
+    """
+    Re-executes a program deterministically from a log written by TraceRecorder.
+    RND and INPUT take their values from the log, and every executed statement
+    and watched variable write is checked against it.
+    """
+
+    def __init__(self, stream):
+        """
+        stream: binary stream opened for reading
+        """
+        self._reader = _Reader(stream)
+        if stream.read(len(MAGIC)) != MAGIC:
+            raise ValueError("Not an SBasic trace log")
+        version = self._reader.byte()
+        if version != VERSION:
+            raise ValueError(f"Unsupported trace log version {version}")
+        self._checksum = unpack("<I", self._reader._read(4))[0]
+        self._watch = frozenset(self._reader.string() for _ in range(self._reader.varint()))
+        self._steps = 0             # statements executed so far
+        self._last_pc = -1
+        self._pending_steps = 0
+        self._until_line = None
+        self._until_step = None
+
+    def steps(self):
+        return self._steps
+
+    def replay(self, interpreter, until_line=None, until_step=None):
+        """
+        Runs the loaded program of the interpreter from the log. Stops before the
+        first statement of line until_line, before statement number until_step or
+        when the log ends.
+
+        Returns the line number where the replay stopped, or None if the program ended.
+        """
+        if program_checksum(interpreter._program) != self._checksum:
+            raise ValueError("The trace log was recorded from a different program")
+
+        self._until_line = until_line
+        self._until_step = until_step
+        interpreter.set_tracer(self)
+        try:
+            interpreter.run()
+        except _ReplayStop:
+            line_number, _, _ = interpreter._program[interpreter._pc]
+            return line_number
+        finally:
+            interpreter.set_tracer(None)
+        return None
+
+    def attach(self, interpreter):
+        self._detached = (interpreter, interpreter._expr_interpreter._random, interpreter._input_function)
+        interpreter._expr_interpreter._random = self._replayed_random
+        interpreter._input_function = self._replayed_input
+        self._program = interpreter._program
+        self._output = interpreter._output
+
+    def detach(self):
+        _restore(*self._detached)
+
+    def statement(self, pc):
+        if (self._until_step is not None and self._steps >= self._until_step) \
+            or (self._until_line is not None and self._program[pc][0] == self._until_line):
+            raise _ReplayStop()
+
+        if self._pending_steps == 0:
+            tag = self._reader.byte()
+            if tag is None:
+                raise _ReplayStop()
+            if tag == _STEP:
+                self._pending_steps = self._reader.varint()
+                expected = self._last_pc + 1
+            elif tag == _JUMP:
+                expected = self._reader.varint()
+            else:
+                raise RuntimeError(f"Replay diverged at statement {self._steps}: unexpected record {tag}")
+        else:
+            expected = self._last_pc + 1
+
+        if self._pending_steps:
+            self._pending_steps -= 1
+        if pc != expected:
+            raise RuntimeError(f"Replay diverged at statement {self._steps}: expected index {expected}, found {pc}")
+        self._last_pc = pc
+        self._steps += 1
+
+    def variable(self, name, value):
+        if name in self._watch:
+            self._expect(_WRITE)
+            logged_name = self._reader.string()
+            logged_value = self._reader.value()
+            if logged_name != name or logged_value != value:
+                raise RuntimeError(f"Replay diverged at statement {self._steps}: {name} = {value}, logged {logged_name} = {logged_value}")
+
+    def close(self):
+        pass
+
+    def _expect(self, tag):
+        if self._pending_steps:
+            raise RuntimeError(f"Replay diverged at statement {self._steps}: log expects more statements")
+        found = self._reader.byte()
+        if found != tag:
+            raise RuntimeError(f"Replay diverged at statement {self._steps}: unexpected record {found}")
+
+    def _replayed_random(self):
+        self._expect(_RND)
+        return self._reader.double()
+
+    def _replayed_input(self, prompt):
+        self._expect(_INPUT)
+        value = self._reader.string()
+        self._output.message(f"{prompt}{value}")
+        return value
@@ -1,13 +1,89 @@
-import re
 from math import sqrt, cos, sin, tan, acos, asin, atan, log, exp, floor, pi
 from random import random
+from TokenType import NUMBER, STRING, FUNCTION_NAME, FUNCTION_PARAMS, OPERATOR, VARIABLE, PAREN_OPEN, PAREN_CLOSE
 
 class _Operator:
-    def __init__(self, key, precedence, nparams, func):
+    __slots__ = ("key", "precedence", "nparams", "func", "with_interpreter", "numeric")
+
+    def __init__(self, key, precedence, nparams, func, with_interpreter=False, numeric=False):
         self.key = key
         self.precedence = precedence
         self.nparams = nparams
         self.func  = func
+        self.with_interpreter = with_interpreter
+        self.numeric = numeric      # operador binario que solo admite números
+
+
+def _divide(a, b):
+    """División que conserva los enteros cuando el resultado es exacto"""
+    if b == 0:
+        raise ValueError("Zero division")
+    if type(a) is int and type(b) is int and a % b == 0:
+        return a // b
+    return a / b
+
+
+def parse_number(text):
+    """Convierte un texto en int si representa un entero, o en float en otro caso"""
+    try:
+        return int(text)
+    except ValueError:
+        return float(text)
+
+
+# Tabla de operadores compartida por todos los intérpretes. Los operadores que
+# necesitan el intérprete (RND, FN, VAL) lo reciben como primer parámetro.
+OPERATORS = {operator.key: operator for operator in (
+    _Operator('RND', 7, 0, lambda interpreter: interpreter._random(), with_interpreter=True),
+    _Operator('PI', 7, 0, lambda: pi),
+    _Operator('FN', 7, 2, lambda interpreter, n, p: interpreter._functions[n].resolve(interpreter, p), with_interpreter=True),
+    _Operator('NEG', 6, 1, lambda a: -a),
+    _Operator('SQR', 6, 1, lambda a: sqrt(a)),
+    _Operator('COS', 6, 1, lambda a: cos(a)),
+    _Operator('SIN', 6, 1, lambda a: sin(a)),
+    _Operator('TAN', 6, 1, lambda a: tan(a)),
+    _Operator('ACS', 6, 1, lambda a: acos(a)),
+    _Operator('ASN', 6, 1, lambda a: asin(a)),
+    _Operator('ATN', 6, 1, lambda a: atan(a)),
+    _Operator('LN', 6, 1, lambda a: log(a)),
+    _Operator('EXP', 6, 1, lambda a: exp(a)),
+    _Operator('INT', 6, 1, lambda a: floor(a)),
+    _Operator('ABS', 6, 1, lambda a: abs(a)),
+    _Operator('STR$', 6, 1, lambda a: str(f"{a:g}") if isinstance(a, (int, float)) else (_ for _ in ()).throw(ValueError(f"'{a}' is not a number"))),
+    _Operator('LEN', 6, 1, lambda a: len(a) if isinstance(a, str) else (_ for _ in ()).throw(ValueError(f"{a} is not a string"))),
+    _Operator('SGN', 6, 1, lambda a: -1 if a < 0 else 1 if a > 0 else 0),
+    _Operator('VAL', 6, 1, lambda interpreter, a: interpreter.evaluate(a), with_interpreter=True),
+    _Operator('^', 5, 2, lambda a, b: a ** b, numeric=True),
+    _Operator('*', 5, 2, lambda a, b: a * b, numeric=True),
+    _Operator('/', 5, 2, _divide, numeric=True),
+    _Operator('+', 4, 2, lambda a, b: a + b, numeric=True),
+    _Operator('-', 4, 2, lambda a, b: a - b, numeric=True),
+    _Operator('AT', 3, 2, lambda f, c: f"\x1b[{f};{c}f"),
+    _Operator('TAB', 3, 1, lambda c: f"\x1b[{c}G"),
+    _Operator('TO', 3, 3, lambda s, a, b: s[a-1:b] if isinstance(s, str) else (_ for _ in()).throw(ValueError(f"{s} is not a string"))),
+    _Operator('START_TO', 3, 2, lambda s, b: s[:b] if isinstance(s, str) else (_ for _ in()).throw(ValueError(f"{s} is not a string"))),
+    _Operator('TO_END', 3, 2, lambda s, a: s[a-1:] if isinstance(s, str) else (_ for _ in()).throw(ValueError(f"{s} is not a string"))),
+    _Operator('>', 2, 2, lambda a, b: a > b),
+    _Operator('<', 2, 2, lambda a, b: a < b),
+    _Operator('=', 2, 2, lambda a, b: a == b),
+    _Operator('<=', 2, 2, lambda a, b: a <= b),
+    _Operator('=<', 2, 2, lambda a, b: a <= b),
+    _Operator('>=', 2, 2, lambda a, b: a >= b),
+    _Operator('=>', 2, 2, lambda a, b: a >= b),
+    _Operator('<>', 2, 2, lambda a, b: a != b),
+    _Operator('NOT', 1, 1, lambda a: not a),
+    _Operator('AND', 0, 2, lambda a, b: a and b, numeric=True),
+    _Operator('OR', 0, 2, lambda a, b: a or b, numeric=True),
+    _Operator('NOR', 0, 2, lambda a, b: not (a or b), numeric=True)
+)}
+
+_COMPARISONS = frozenset(('>', '<', '=', '<=', '=<', '>=', '=>', '<>'))
+
+# Operadores candidatos según su primer carácter, del más largo al más corto
+_OPERATOR_CANDIDATES = {}
+for _key in sorted(OPERATORS, key=len, reverse=True):
+    _OPERATOR_CANDIDATES.setdefault(_key[0], []).append(_key)
+del _key
 
 
 class ExpressionInterpreter:
@@ -25,59 +101,17 @@ class ExpressionInterpreter:
         self._numeric_vars = numeric_vars if numeric_vars is not None else {}
         self._string_vars = string_vars if string_vars is not None else {}
         self._functions = functions if functions is not None else {}
+        self._random = random
         
-        self._register_operators((
-            _Operator('RND', 7, 0, lambda: random()),
-            _Operator('PI', 7, 0, lambda: pi),
-            _Operator('FN', 7, 2, lambda n, p: self._functions[n].resolve(self, p)),
-            _Operator('NEG', 6, 1, lambda a: -a),
-            _Operator('SQR', 6, 1, lambda a: sqrt(a)),
-            _Operator('COS', 6, 1, lambda a: cos(a)),
-            _Operator('SIN', 6, 1, lambda a: sin(a)),
-            _Operator('TAN', 6, 1, lambda a: tan(a)),
-            _Operator('ACS', 6, 1, lambda a: acos(a)),
-            _Operator('ASN', 6, 1, lambda a: asin(a)),
-            _Operator('ATN', 6, 1, lambda a: atan(a)),
-            _Operator('LN', 6, 1, lambda a: log(a)),
-            _Operator('EXP', 6, 1, lambda a: exp(a)),
-            _Operator('INT', 6, 1, lambda a: floor(a)),
-            _Operator('ABS', 6, 1, lambda a: abs(a)),
-            _Operator('STR$', 6, 1, lambda a: str(f"{a:g}") if isinstance(a, (int, float)) else (_ for _ in ()).throw(ValueError(f"'{a}' is not a number"))),
-            _Operator('LEN', 6, 1, lambda a: len(a) if isinstance(a, str) else (_ for _ in ()).throw(ValueError(f"{a} is not a string"))),
-            _Operator('SGN', 6, 1, lambda a: -1 if a < 0 else 1 if a > 0 else 0),
-            _Operator('VAL', 6, 1, lambda a: self.evaluate(a)),
-            _Operator('^', 5, 2, lambda a, b: a ** b),
-            _Operator('*', 5, 2, lambda a, b: a * b),
-            _Operator('/', 5, 2, lambda a, b: a / b if b != 0 else (_ for _ in ()).throw(ValueError("Zero division"))),
-            _Operator('+', 4, 2, lambda a, b: a + b),
-            _Operator('-', 4, 2, lambda a, b: a - b),
-            _Operator('AT', 3, 2, lambda f, c: f"\x1b[{f};{c}f"),
-            _Operator('TAB', 3, 1, lambda c: f"\x1b[{c}G"),
-            _Operator('TO', 3, 3, lambda s, a, b: s[a-1:b] if isinstance(s, str) else (_ for _ in()).throw(ValueError(f"{s} is not a string"))),
-            _Operator('START_TO', 3, 2, lambda s, b: s[:b] if isinstance(s, str) else (_ for _ in()).throw(ValueError(f"{s} is not a string"))),
-            _Operator('TO_END', 3, 2, lambda s, a: s[a-1:] if isinstance(s, str) else (_ for _ in()).throw(ValueError(f"{s} is not a string"))),
-            _Operator('>', 2, 2, lambda a, b: a > b),
-            _Operator('<', 2, 2, lambda a, b: a < b),
-            _Operator('=', 2, 2, lambda a, b: a == b),
-            _Operator('<=', 2, 2, lambda a, b: a <= b),
-            _Operator('=<', 2, 2, lambda a, b: a <= b),
-            _Operator('>=', 2, 2, lambda a, b: a >= b),
-            _Operator('=>', 2, 2, lambda a, b: a >= b),
-            _Operator('<>', 2, 2, lambda a, b: a != b),
-            _Operator('NOT', 1, 1, lambda a: not a),
-            _Operator('AND', 0, 2, lambda a, b: a and b),
-            _Operator('OR', 0, 2, lambda a, b: a or b),
-            _Operator('NOR', 0, 2, lambda a, b: not (a or b))
-        ))
-
-    def _register_operators(self, operators):
-
-        self._operators = {}
-        for operator in operators:
-            self._operators[operator.key] = operator
-    
-    def _tokenize(self, expr):
-        """Convierte la expresión en tokens"""
+        self._operators = OPERATORS
+        self._numeric_expressions = frozenset()
+
+    def _tokenize(self, expr, resolve_variables=True):
+        """Convierte la expresión en tokens
+
+        Con resolve_variables=False las variables no se sustituyen por su valor,
+        sino que se emiten como tokens (VARIABLE, nombre).
+        """
         expr = expr.strip()
         self._tokens = []
         self._expr_index = 0
@@ -97,7 +131,7 @@ class ExpressionInterpreter:
                         j += 1
                 if j >= len(expr):
                     raise ValueError("String sin cerrar")
-                self._tokens.append(('STRING', expr[self._expr_index+1:j].replace('""','"')))
+                self._tokens.append((STRING, expr[self._expr_index+1:j].replace('""','"')))
                 self._expr_index = j + 1
             
             # Operador
@@ -113,14 +147,16 @@ class ExpressionInterpreter:
                 var_name = expr[self._expr_index:j]
                 
                 # Determinar si es variable de string o numérica
-                if var_name.endswith('$'):
+                if not resolve_variables:
+                    self._tokens.append((VARIABLE, var_name))
+                elif var_name.endswith('$'):
                     if var_name not in self._string_vars:
                         raise ValueError(f"Variable de texto '{var_name}' no definida")
-                    self._tokens.append(('STRING', self._string_vars[var_name]))
+                    self._tokens.append((STRING, self._string_vars[var_name]))
                 else:
                     if var_name not in self._numeric_vars:
                         raise ValueError(f"Variable numérica '{var_name}' no definida")
-                    self._tokens.append(('NUMBER', self._numeric_vars[var_name]))
+                    self._tokens.append((NUMBER, self._numeric_vars[var_name]))
                 
                 self._expr_index = j
             
@@ -135,21 +171,21 @@ class ExpressionInterpreter:
                     j += 1
                 num_str = expr[self._expr_index:j]
                 if '.' in num_str:
-                    self._tokens.append(('NUMBER', float(num_str)))
+                    self._tokens.append((NUMBER, float(num_str)))
                 else:
-                    self._tokens.append(('NUMBER', int(num_str)))
+                    self._tokens.append((NUMBER, int(num_str)))
                 self._expr_index = j
             
             # Paréntesis
             elif expr[self._expr_index] == '(':
-                self._tokens.append(('PAREN_OPEN', expr[self._expr_index]))
+                self._tokens.append((PAREN_OPEN, expr[self._expr_index]))
                 self._expr_index += 1
 
             elif expr[self._expr_index] == ')':
                 if self._tokens[-1][1] == 'TO':
-                    self._tokens[-1] = ('OPERATOR' ,'TO_END')
+                    self._tokens[-1] = (OPERATOR, 'TO_END')
 
-                self._tokens.append(('PAREN_CLOSE', expr[self._expr_index]))
+                self._tokens.append((PAREN_CLOSE, expr[self._expr_index]))
                 self._expr_index += 1
             
             elif (expr[self._expr_index] == ',' 
@@ -162,24 +198,23 @@ class ExpressionInterpreter:
 
     def _is_operator(self, expression):
 
-        if expression[self._expr_index] == '-' and (len(self._tokens) == 0 or self._tokens[-1][0] == "PAREN_OPEN"):
-            self._tokens.append(('OPERATOR', 'NEG'))
+        if expression[self._expr_index] == '-' and (len(self._tokens) == 0 or self._tokens[-1][0] == PAREN_OPEN):
+            self._tokens.append((OPERATOR, 'NEG'))
             self._expr_index += 1
             return True
 
         operator_candidate = ""
-        for operator in self._operators:
-            end_index = self._expr_index + len(operator)
-            if (expression[self._expr_index: end_index] == operator 
-                and len(operator_candidate) < len(operator)):
+        for operator in _OPERATOR_CANDIDATES.get(expression[self._expr_index], ()):
+            if expression.startswith(operator, self._expr_index):
                 operator_candidate = operator
+                break
 
         if operator_candidate:
             self._expr_index += len(operator_candidate)
-            if operator_candidate == "TO" and self._tokens[-1][0] == "PAREN_OPEN":
+            if operator_candidate == "TO" and self._tokens[-1][0] == PAREN_OPEN:
                 operator_candidate = "START_TO"
 
-            self._tokens.append(('OPERATOR', operator_candidate))
+            self._tokens.append((OPERATOR, operator_candidate))
 
             if operator_candidate == "FN":
                 while expression[self._expr_index] == ' ':
@@ -188,7 +223,7 @@ class ExpressionInterpreter:
                 while expression[self._expr_index] not in ' (':
                     self._expr_index += 1
                 name_end = self._expr_index
-                self._tokens.append(('FUNCTION_NAME', expression[name_start: name_end]))
+                self._tokens.append((FUNCTION_NAME, expression[name_start: name_end]))
 
                 while expression[self._expr_index] != '(':
                     self._expr_index += 1
@@ -198,27 +233,60 @@ class ExpressionInterpreter:
                 params_end = self._expr_index
 
                 self._expr_index += 1
-                self._tokens.append(('FUNCTION_PARAMS', expression[params_start: params_end]))
+                self._tokens.append((FUNCTION_PARAMS, expression[params_start: params_end]))
             
             return True
 
         return False
     
+    def function(self, name):
+        """Devuelve la definición de la función FN indicada, o None si no existe"""
+        return self._functions.get(name)
+
+    def scan(self, expr):
+        """Tokeniza la expresión sin resolver las variables (análisis estático)"""
+        self._tokenize(expr, resolve_variables=False)
+        return self._tokens
+
+    def set_numeric_expressions(self, expressions):
+        """
+        Expresiones en las que el análisis estático ha demostrado que todos los operadores
+        reciben números: se evalúan sin comprobar tipos.
+        """
+        self._numeric_expressions = frozenset(expressions)
+
     def evaluate(self, expr):
         """Evalúa la expresión usando el algoritmo Shunting Yard"""
         self._tokenize(expr)
-        return self._evaluate_tokens()
+        try:
+            if expr in self._numeric_expressions:
+                return self.reduce(self._tokens, self._apply_numeric_operator)
+            return self._evaluate_tokens()
+        except OverflowError:
+            raise ValueError("Number too big") from None
+        except ZeroDivisionError:
+            raise ValueError("Zero division") from None
     
     def _evaluate_tokens(self):
         """Evalúa los tokens usando notación postfija (RPN)"""
+        return self.reduce(self._tokens, self._apply_operator)
+
+    def reduce(self, tokens, apply_operator):
+        """
+        Recorre los tokens con el algoritmo Shunting Yard.
+
+        Args:
+            tokens: Lista de tokens (tipo, valor)
+            apply_operator: Función (stack, operador) que aplica cada operador sobre la pila
+        """
         output_queue = []
         operator_stack = []
         
-        for token_type, token_value in self._tokens:
-            if token_type in ('NUMBER', 'STRING', 'FUNCTION_NAME', 'FUNCTION_PARAMS'):
+        for token_type, token_value in tokens:
+            if token_type <= FUNCTION_PARAMS:
                 output_queue.append(token_value)
             
-            elif token_type == 'OPERATOR':
+            elif token_type == OPERATOR:
                 while (operator_stack 
                     and operator_stack[-1] != '(' 
                     and ((self._operators[operator_stack[-1]].precedence 
@@ -227,16 +295,16 @@ class ExpressionInterpreter:
                             and self._operators[operator_stack[-1]].precedence 
                                 == self._operators[token_value].precedence))):
                     op = operator_stack.pop()
-                    self._apply_operator(output_queue, op)
+                    apply_operator(output_queue, op)
 
                 operator_stack.append(token_value)
             
-            elif token_type.startswith('PAREN'):
+            elif token_type >= PAREN_OPEN:
                 if token_value == '(':
                     operator_stack.append('(')
                 else:  # ')'
                     while operator_stack and operator_stack[-1] != '(':
-                        self._apply_operator(output_queue, operator_stack.pop())
+                        apply_operator(output_queue, operator_stack.pop())
                     if not operator_stack:
                         raise ValueError("Paréntesis desbalanceados")
                     operator_stack.pop()  # Remover '('
@@ -246,13 +314,22 @@ class ExpressionInterpreter:
             op = operator_stack.pop()
             if op == '(':
                 raise ValueError("Paréntesis desbalanceados")
-            self._apply_operator(output_queue, op)
+            apply_operator(output_queue, op)
         
         if len(output_queue) != 1:
             raise ValueError("Expresión inválida")
         
         return output_queue[0]
     
+    def _apply_numeric_operator(self, stack, operator):
+        """Aplica un operador de una expresión numérica verificada: sin comprobaciones de tipo"""
+        operator_definition = self._operators[operator]
+        if operator_definition.numeric:
+            right = stack.pop()
+            stack[-1] = operator_definition.func(stack[-1], right)
+        else:
+            self._apply_operator(stack, operator)
+
     def _apply_operator(self, stack, operator):
         """Aplica un operador a los últimos dos elementos del stack""" 
         nparams = self._operators[operator].nparams
@@ -264,7 +341,16 @@ class ExpressionInterpreter:
             right = stack.pop()
             left = stack.pop()
 
-            if operator == 'FN' or operator in '<>>=<=':
+            # Operaciones numéricas: una sola comprobación de tipo por operando
+            if self._operators[operator].numeric and type(left) is not str and type(right) is not str:
+                result = self._operators[operator].func(left, right)
+                stack.append(result)
+
+            elif operator == 'FN':
+                result = self._operators[operator].func(self, left, right)
+                stack.append(result)
+
+            elif operator in _COMPARISONS:
                 result = self._operators[operator].func(left, right)
                 stack.append(result)
 
@@ -308,11 +394,17 @@ class ExpressionInterpreter:
                 raise ValueError("Operación no válida")
 
         elif nparams == 1:
-            result = self._operators[operator].func(stack.pop())
+            if self._operators[operator].with_interpreter:
+                result = self._operators[operator].func(self, stack.pop())
+            else:
+                result = self._operators[operator].func(stack.pop())
             stack.append(result)
 
         elif nparams == 0:
-            result = self._operators[operator].func()
+            if self._operators[operator].with_interpreter:
+                result = self._operators[operator].func(self)
+            else:
+                result = self._operators[operator].func()
             stack.append(result)
 
         elif nparams == 3:
@@ -417,7 +509,22 @@ if __name__ == "__main__":
         ('"Esto es una cadena"(6+7 TO 6*3)', 'cadena'),
         ('"Esto es una cadena"(13 TO)', 'cadena'),
         ('"Esto es una cadena"(y TO x)', ' es un'),
-        ('lenguaje$(2 TO 5)', 'ytho')
+        ('lenguaje$(2 TO 5)', 'ytho'),
+
+        # Comparaciones entre strings
+        ('"b" => "a"', True),
+        ('"a" => "b"', False),
+        ('"a" =< "b"', True),
+
+        # Enteros exactos
+        ('8 / 2', 4),
+        ('7 / 2', 3.5),
+        ('(2 ^ 60 + 1) * 2 / 2 = 2 ^ 60 + 1', True),
+
+        # Errores de BASIC (se espera la excepción)
+        ('EXP 1000', ValueError("Number too big")),
+        ('1 / 0', ValueError("Zero division")),
+        ('0 ^ (-1)', ValueError("Zero division"))
     ]
     
     print("Variables numéricas:", numeric_vars)
@@ -436,7 +543,9 @@ if __name__ == "__main__":
             correct_message = "OK" if expected_result == result else f"; expected: {expected_result}"
             print(f"{expr:35} = {result} {correct_message}")
         except Exception as e:
-            print(f"{expr:35} = ERROR: {e}")
+            expected_error = isinstance(expected_result, Exception) and type(e) is type(expected_result) \
+                and str(e) == str(expected_result)
+            print(f"{expr:35} = ERROR: {e} {'OK' if expected_error else ''}")
     
     # Ejemplo interactivo
     print("\n" + "=" * 60)
@@ -1,29 +1,93 @@
+from collections import OrderedDict
 from ExpressionInterpreter import ExpressionInterpreter
 from FunctionParameter import FunctionParameter
+from TokenType import FUNCTION_NAME, FUNCTION_PARAMS, OPERATOR, VARIABLE
 from ValueType import ValueType
 
 class FunctionDefinition:
 
-    def __init__(self, return_type: ValueType, params: [FunctionParameter], body: str):
+    __slots__ = ("params", "body", "return_type", "cache_size", "hits", "misses", "_cache", "_pure")
+
+    def __init__(self, return_type: ValueType, params: [FunctionParameter], body: str, cache_size: int = 0):
+        """
+        cache_size: maximum number of results kept when the function is pure (0 disables the cache)
+        """
         self.params = params
         self.body = body
         self.return_type = return_type
+        self.cache_size = cache_size
+        self.hits = 0
+        self.misses = 0
+        self._cache = OrderedDict()     # (type, value) of each argument -> result, in LRU order
+        self._pure = None
 
 
     def resolve(self, interpreter: ExpressionInterpreter, params: str):
         params_evaluated = [interpreter.evaluate(p.strip()) for p in params.split(',')]
 
-        list(map(self._applyReplace, self.params, params_evaluated))
-        result = interpreter.evaluate(self.body)
+        if not self.cache_size or not self.is_pure(interpreter):
+            return self._evaluate(interpreter, params_evaluated)
+
+        key = tuple((type(p), p) for p in params_evaluated)
+        if key in self._cache:
+            self.hits += 1
+            self._cache.move_to_end(key)
+            return self._cache[key]
+
+        self.misses += 1
+        result = self._evaluate(interpreter, params_evaluated)
+        self._cache[key] = result
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
         return result
 
-       
-    def _applyReplace(self, param_definition, param_evaluated):
+
+    def is_pure(self, interpreter: ExpressionInterpreter, resolving=()):
+        """
+        A function is pure when its body does not use RND or VAL, reads no variable
+        other than its parameters and calls only pure functions.
+        """
+        if self._pure is None:
+            if self in resolving:
+                return False
+            self._pure = self._check_purity(interpreter, self.body, resolving + (self,))
+        return self._pure
+
+
+    def invalidate(self):
+        """Forgets the cached results and the purity (the functions it calls may have changed)"""
+        self._cache.clear()
+        self._pure = None
+
+
+    def _check_purity(self, interpreter, expression, resolving):
+        for token_type, token_value in list(interpreter.scan(expression)):
+            if token_type == VARIABLE and token_value not in self.params:
+                return False
+            if token_type == OPERATOR and token_value in ('RND', 'VAL'):
+                return False
+            if token_type == FUNCTION_NAME:
+                function = interpreter.function(token_value)
+                if function is None or not function.is_pure(interpreter, resolving):
+                    return False
+            if token_type == FUNCTION_PARAMS and not self._check_purity(interpreter, token_value, resolving):
+                return False
+        return True
+
+
+    def _evaluate(self, interpreter, params_evaluated):
+        body = self.body
+        for param_definition, param_evaluated in zip(self.params, params_evaluated):
+            body = self._applyReplace(body, param_definition, param_evaluated)
+        return interpreter.evaluate(body)
+
+
+    def _applyReplace(self, body, param_definition, param_evaluated):
 
         if isinstance(param_evaluated, str):
             replacement = param_evaluated.replace('"', '""')
             replacement = f'"{replacement}"'
         else:
-            replacement = str(param_evaluated)           
+            replacement = str(param_evaluated)
 
-        self.body = self.body.replace(param_definition, replacement)
+        return body.replace(param_definition, replacement)
@@ -2,6 +2,8 @@ from ValueType import ValueType
 
 class FunctionParameter:
 
+    __slots__ = ("type", "name")
+
     def __init__(self, param_type: ValueType, name: str):
         self.type = param_type
         self.name = name
@@ -0,0 +1,33 @@
+from functools import lru_cache
+from sys import intern
+from re import compile as re_compile, IGNORECASE
+
+# Palabra clave al comienzo de una sentencia: REM (todo lo que le sigue es comentario,
+# como en el Spectrum), GO TO / GO SUB escritos en dos palabras o una secuencia de letras
+_LEADING_KEYWORD = re_compile(r"REM|GO\s+(?:TO|SUB)(?![A-Z])|[A-Z]+", IGNORECASE)
+
+
+@lru_cache(maxsize=4096)
+def leading_keyword(code):
+    """
+    Palabra clave con la que empieza la sentencia, en mayúsculas y sin espacios
+    ('GO TO 10' -> 'GOTO'), o '' si la sentencia no empieza por una letra.
+
+    La palabra clave es la secuencia completa de letras, así que 'DEFAULT' no se
+    confunde con 'DEF' ni 'PRINTER' con 'PRINT'. La excepción es REM: 'REMARK' y
+    'REMcomentario' son comentarios.
+    """
+    match = _LEADING_KEYWORD.match(code)
+    if match is None:
+        return ""
+    return intern("".join(match.group().upper().split()))
+
+
+def normalize_keyword(keyword):
+    """Forma con la que se registra una palabra clave; ValueError si no es válida"""
+    normalized = "".join(keyword.split()).upper()
+    if not normalized.isalpha() or not normalized.isascii():
+        raise ValueError(f"Invalid keyword: '{keyword}'")
+    if normalized.startswith("REM") and normalized != "REM":
+        raise ValueError(f"Invalid keyword: '{keyword}' would be read as a REM comment")
+    return normalized
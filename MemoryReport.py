@@ -0,0 +1,80 @@
+import argparse
+import gc
+import os
+import tracemalloc
+
+from BasicInterpreter import BasicInterpreter
+
+# Memory held by loaded programs, measured with tracemalloc:
+#
+#   per line     a synthetic program of distinct lines (LET, PRINT, IF and REM), loaded
+#                and statically checked; source text given to load() is not counted
+#   per session  an interpreter with one of the sample programs loaded, as kept by
+#                the REPL or by each request of the server
+
+_SAMPLE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "code_samples", "connect4.bas")
+
+
+def synthetic_program(lines):
+    program = ['1 LET a = 1 : LET b$ = "x" : LET c = 0']
+    for n in range(lines):
+        number = 10 * (n + 1)
+        kind = n % 4
+        if kind == 0:
+            program.append(f"{number} LET a = a + {n} * 2")
+        elif kind == 1:
+            program.append(f'{number} PRINT b$; a / {n + 1}; "{n}"')
+        elif kind == 2:
+            program.append(f"{number} IF a > {n} THEN LET b$ = b$(1 TO 1) : LET c = {n}")
+        else:
+            program.append(f"{number} REM line {n}")
+    return program
+
+
+def _traced(build):
+    """Bytes still allocated by build() once it returns, and its peak"""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        kept = build()
+        gc.collect()
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del kept
+    return current, peak
+
+
+def _load(program, static_check=True):
+    interpreter = BasicInterpreter(static_check=static_check)
+    interpreter.load(program)
+    return interpreter
+
+
+def measure(lines=5000, sessions=50):
+    """{measurement: bytes}"""
+    program = synthetic_program(lines)
+    with open(_SAMPLE) as file:
+        sample = file.readlines()
+
+    results = {}
+    results["per line"] = _traced(lambda: _load(program))[0] / len(program)
+    results["per line, unchecked"] = _traced(lambda: _load(program, static_check=False))[0] / len(program)
+    current, peak = _traced(lambda: [_load(sample) for _ in range(sessions)])
+    results["per session"] = current / sessions
+    results["load peak"] = _traced(lambda: _load(program))[1]
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SBasic memory report")
+    parser.add_argument("--lines", type=int, default=5000, help="Lines of the synthetic program")
+    parser.add_argument("--sessions", type=int, default=50, help="Sessions kept alive at the same time")
+    args = parser.parse_args()
+
+    for name, size in measure(args.lines, args.sessions).items():
+        print(f"{name:20} {size:12,.0f} bytes")
+
+
+if __name__ == "__main__":
+    main()
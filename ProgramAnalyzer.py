@@ -0,0 +1,595 @@
+from ExpressionInterpreter import ExpressionInterpreter
+from Keywords import leading_keyword
+from TokenType import NUMBER, STRING, VARIABLE
+from ValueType import ValueType
+from re import split as re_split
+
+
+class AnalysisError:
+
+    __slots__ = ("line_number", "code", "message")
+
+    def __init__(self, line_number: int, code: str, message: str):
+        self.line_number = line_number
+        self.code = code
+        self.message = message
+
+    def __str__(self):
+        return f"{self.message}\r\n\tat line {self.line_number} {self.code}"
+
+
+class ProgramAnalysis:
+    """Result of the static analysis of a loaded program"""
+
+    __slots__ = ("errors", "successors", "reachable", "typed_assignments", "expression_types", "numeric_expressions")
+
+    def __init__(self):
+        self.errors = []                # [AnalysisError]
+        self.successors = []            # program index -> (program index, ...)
+        self.reachable = set()          # program indexes reachable from the first statement
+        self.typed_assignments = set()  # program indexes whose LET is proven type safe
+        self.expression_types = {}      # expression -> ValueType
+        self.numeric_expressions = set()    # expressions whose operators only ever see numbers
+
+    def freeze(self):
+        """Turns the sets into frozensets, sized for their final contents"""
+        self.reachable = frozenset(self.reachable)
+        self.typed_assignments = frozenset(self.typed_assignments)
+        self.numeric_expressions = frozenset(self.numeric_expressions)
+
+    def is_valid(self):
+        return not self.errors
+
+
+class ParsedStatement:
+    """
+    What a statement registered with BasicInterpreter.register_statement declares
+    to the static check
+    """
+
+    __slots__ = ("expressions", "writes", "jumps", "falls_through")
+
+    def __init__(self, expressions=(), writes=(), jumps=(), falls_through=True):
+        self.expressions = list(expressions)    # expressions the statement evaluates
+        self.writes = list(writes)              # variables it assigns
+        self.jumps = list(jumps)                # line numbers it may jump to
+        self.falls_through = falls_through      # False if it never continues with the next statement
+
+
+class _Statement:
+    """Facts collected from a single program statement"""
+
+    __slots__ = ("reads", "writes", "jumps", "falls_through", "is_return", "gosub", "next_variable",
+        "for_variable", "typed_assignment")
+
+    def __init__(self):
+        self.reads = set()
+        self.writes = set()
+        self.jumps = []                 # target line numbers (GO TO / GO SUB)
+        self.falls_through = True
+        self.is_return = False
+        self.gosub = False
+        self.next_variable = None
+        self.for_variable = None
+        self.typed_assignment = False
+
+
+class ProgramAnalyzer:
+    """
+    Load-time checker for SBasic programs.
+
+    Builds the control-flow graph from GO TO, GO SUB, RETURN, IF, FOR and NEXT
+    and type-checks every expression using the '$' naming convention, so that
+    undefined lines, variables read before any assignment and type mismatches
+    are reported before the program runs.
+    """
+
+    _numeric_unary = ('NEG', 'SQR', 'COS', 'SIN', 'TAN', 'ACS', 'ASN', 'ATN', 'LN', 'EXP', 'INT', 'ABS', 'SGN')
+    _numeric_binary = ('^', '/', '-', 'AND', 'OR', 'NOR')
+    _arithmetic = ('^', '*', '/', '+', '-', 'AND', 'OR', 'NOR')
+    _numbers = (ValueType.Integer, ValueType.Boolean)
+    _comparisons = ('>', '<', '=', '<=', '=<', '>=', '=>', '<>')
+
+    def __init__(self, expr_interpreter: ExpressionInterpreter = None):
+        self._expr_interpreter = expr_interpreter if expr_interpreter is not None else ExpressionInterpreter()
+
+    def analyze(self, program, line_index, restore_line_index, statement_parsers=None, defined=(), functions=None):
+        """
+        program: [(line_number, part_index, code)] as built by BasicInterpreter.load
+        line_index: line_number -> index in program
+        restore_line_index: line_number -> index in the DATA buffer
+        statement_parsers: keyword -> parse function (or None) of the statements
+            registered with BasicInterpreter.register_statement
+        defined: variables that already have a value when the program starts, as when
+            it is resumed with GO TO or CONTINUE
+        functions: name -> (params, body) of the functions already defined then
+        """
+        functions = functions if functions is not None else {}
+        self._defined = frozenset(defined).union(f"FN {name}" for name in functions)
+        self._known_functions = functions
+        self._statement_parsers = statement_parsers if statement_parsers is not None else {}
+        self._program = program
+        self._line_index = line_index
+        self._restore_line_index = restore_line_index
+        self._analysis = ProgramAnalysis()
+        self._functions = self._collect_functions()
+        self._resolving = set()
+        self._all_numeric = True
+
+        statements = []
+        for idx, (line_number, _, code) in enumerate(program):
+            self._line_number = line_number
+            self._code = code
+            statement = _Statement()
+            self._analyze_sentence(code.strip(), statement)
+            statements.append(statement)
+            if statement.typed_assignment:
+                self._analysis.typed_assignments.add(idx)
+
+        self._build_graph(statements)
+        self._check_assignments(statements)
+        self._analysis.errors.sort(key=lambda error: error.line_number)
+        self._analysis.freeze()
+        return self._analysis
+
+    def _error(self, message):
+        self._analysis.errors.append(AnalysisError(self._line_number, self._code, message))
+
+    def _collect_functions(self):
+        functions = dict(self._known_functions)
+        for line_number, _, code in self._program:
+            self._line_number = line_number
+            self._code = code
+            definition = self._parse_def(code.strip(), report=False)
+            if definition is not None:
+                name, params, body = definition
+                functions[name] = (params, body)
+        return functions
+
+    def _parse_def(self, code, report=True):
+        if leading_keyword(code) != "DEF":
+            then = self._then_part(code)
+            return self._parse_def(then, report) if then is not None else None
+        try:
+            _, function = code.split("FN", 1)
+            header, body = function.strip().split("=", 1)
+            name_raw, params_raw = header.strip().split("(")
+            params = [p.strip() for p in params_raw.strip()[:-1].split(",")]
+            return name_raw.strip(), params, body.strip()
+        except ValueError:
+            if report:
+                self._error("Invalid function definition")
+            return None
+
+    def _then_part(self, code):
+        if leading_keyword(code) == "IF" and " THEN " in code:
+            return code.split(" THEN ", 1)[1].strip()
+        return None
+
+    # ------------------------------------------------------------------
+    # Statements
+    # ------------------------------------------------------------------
+
+    def _analyze_sentence(self, code, statement):
+        keyword = leading_keyword(code)
+        if keyword in self._statement_parsers:
+            self._registered_statement(self._statement_parsers[keyword], code, statement)
+        elif keyword in ProgramAnalyzer._STATEMENTS:
+            try:
+                ProgramAnalyzer._STATEMENTS[keyword](self, code, statement)
+            except ValueError:
+                # Malformed statement, such as 'NEXT' or 'INPUT' without arguments
+                self._error(f"Invalid {keyword} sentence")
+        else:
+            self._error(f"Unknown keyword: {code}")
+
+    def _registered_statement(self, parse, code, statement):
+        if parse is None:
+            return
+        try:
+            parsed = parse(code)
+        except ValueError as e:
+            self._error(str(e))
+            return
+        if not isinstance(parsed, ParsedStatement):
+            parsed = ParsedStatement(parsed)
+        for expr in parsed.expressions:
+            self._expression(expr.strip(), statement)
+        for var_name in parsed.writes:
+            statement.writes.add(var_name.strip())
+        for target_line in parsed.jumps:
+            self._add_jump(target_line, statement)
+        statement.falls_through = parsed.falls_through
+
+    def _print(self, code, statement):
+        if code != "PRINT":
+            _, rest = code.split(" ", 1)
+            for arg in re_split(r';(?=(?:[^"]*"[^"]*")*[^"]*$)', rest.strip()):
+                if arg != "":
+                    self._expression(arg, statement)
+
+    def _goto(self, code, statement):
+        self._jump(code, statement)
+        statement.falls_through = False
+
+    def _let(self, code, statement):
+        try:
+            _, rest = code.split(" ", 1)
+            var, expr = rest.split("=", 1)
+        except ValueError:
+            self._error("Invalid LET sentence")
+            return
+        statement.typed_assignment = self._assignment(var.strip(), expr.strip(), statement)
+
+    def _if(self, code, statement):
+        _, rest = code.split(" ", 1)
+        if " THEN " not in rest:
+            self._error("IF without THEN")
+            return
+        condition, then = rest.split(" THEN ", 1)
+        self._expression(condition.strip(), statement)
+        nested = _Statement()
+        self._analyze_sentence(then.strip(), nested)
+        statement.reads |= nested.reads
+        statement.writes |= nested.writes
+        statement.jumps += nested.jumps
+        statement.is_return = statement.is_return or nested.is_return
+        statement.gosub = statement.gosub or nested.gosub
+        statement.next_variable = nested.next_variable
+        statement.typed_assignment = nested.typed_assignment
+
+    def _input(self, code, statement):
+        _, rest = code.split(" ", 1)
+        chunks = re_split(r'[;,](?=(?:[^"]*"[^"]*")*[^"]*$)', rest)
+        if len(chunks) > 2:
+            self._error("INPUT: Too much arguments")
+            return
+        if len(chunks) == 2:
+            self._expression(chunks[0].strip(), statement)
+        statement.writes.add(chunks[-1].strip())
+
+    def _for(self, code, statement):
+        try:
+            _, rest = code.split(" ", 1)
+            loop_variable, rest = rest.split("=", 1)
+            loop_init, rest = rest.strip().split("TO", 1)
+            if "STEP" in rest:
+                loop_end, loop_step = rest.strip().split("STEP")
+            else:
+                loop_end, loop_step = rest, "1"
+        except ValueError:
+            self._error("Invalid FOR sentence")
+            return
+        loop_variable = loop_variable.strip()
+        if loop_variable.endswith("$"):
+            self._error("Type mismatch. A number was expected.")
+        for expr in (loop_init, loop_end, loop_step):
+            self._numeric_expression(expr.strip(), statement)
+        statement.writes.add(loop_variable)
+        statement.for_variable = loop_variable
+
+    def _next(self, code, statement):
+        _, loop_variable = code.split(" ", 1)
+        statement.reads.add(loop_variable)
+        statement.next_variable = loop_variable
+
+    def _no_effect(self, code, statement):
+        pass
+
+    def _stop(self, code, statement):
+        statement.falls_through = False
+
+    def _gosub(self, code, statement):
+        self._jump(code, statement)
+        statement.gosub = True
+        statement.falls_through = False
+
+    def _return(self, code, statement):
+        statement.is_return = True
+        statement.falls_through = False
+
+    def _read(self, code, statement):
+        _, params = code.split(" ", 1)
+        for var_name in params.split(","):
+            statement.writes.add(var_name.strip())
+
+    def _restore(self, code, statement):
+        items = code.split(" ")
+        if len(items) > 1:
+            target = self._line_number_of(items[-1])
+            if target is not None and target not in self._restore_line_index:
+                self._error(f"Undefined DATA line number {target}")
+
+    def _def(self, code, statement):
+        definition = self._parse_def(code)
+        if definition is not None:
+            self._check_function(*definition)
+            statement.writes.add(f"FN {definition[0]}")
+
+    def _numeric_parameter(self, code, statement):
+        _, param = code.split(" ", 1)
+        self._numeric_expression(param.strip(), statement)
+
+    # Built-in statements: keyword -> checker
+    _STATEMENTS = {
+        "PRINT": _print,
+        "GOTO": _goto,
+        "LET": _let,
+        "IF": _if,
+        "INPUT": _input,
+        "FOR": _for,
+        "NEXT": _next,
+        "REM": _no_effect,
+        "STOP": _stop,
+        "GOSUB": _gosub,
+        "RETURN": _return,
+        "READ": _read,
+        "RESTORE": _restore,
+        "RANDOMIZE": _no_effect,
+        "DEF": _def,
+        "CLS": _no_effect,
+        "WAIT": _numeric_parameter,
+        "INK": _numeric_parameter,
+        "PAPER": _numeric_parameter,
+        "BRIGHT": _numeric_parameter,
+        "FLASH": _numeric_parameter,
+    }
+
+    def _line_number_of(self, text):
+        try:
+            return int(text)
+        except ValueError:
+            self._error(f"Invalid line number {text}")
+            return None
+
+    def _jump(self, code, statement):
+        target_line = self._line_number_of(code.split()[-1])
+        if target_line is not None:
+            self._add_jump(target_line, statement)
+
+    def _add_jump(self, target_line, statement):
+        if target_line not in self._line_index:
+            self._error(f"Undefined line number {target_line}")
+            return
+        statement.jumps.append(target_line)
+
+    def _assignment(self, var_name, expr, statement):
+        value_type = self._expression(expr, statement)
+        statement.writes.add(var_name)
+        if value_type is None:
+            return False
+        if var_name.endswith("$") and value_type != ValueType.String:
+            self._error("Type mismatch. A string was expected.")
+            return False
+        if not var_name.endswith("$") and value_type == ValueType.String:
+            self._error("Type mismatch. A number was expected.")
+            return False
+        return True
+
+    def _check_function(self, name, params, body):
+        facts = _Statement()
+        body_type = self._expression(body, facts, params)
+        if body_type is None:
+            return
+        if name.endswith("$") != (body_type == ValueType.String):
+            self._error(f"Type mismatch in FN {name}")
+
+    # ------------------------------------------------------------------
+    # Expressions
+    # ------------------------------------------------------------------
+
+    def _numeric_expression(self, expr, statement):
+        if self._expression(expr, statement) == ValueType.String:
+            self._error("Type mismatch. A number was expected.")
+
+    def _expression(self, expr, statement, local_names=()):
+        """
+        Infers the type of the expression, recording the variables it reads.
+        Returns a ValueType, or None when the type can only be known at runtime.
+        """
+        try:
+            tokens = list(self._expr_interpreter.scan(expr))
+        except (ValueError, IndexError) as e:
+            self._error(f"Invalid expression '{expr}': {e}")
+            return None
+
+        typed_tokens = []
+        for token_type, token_value in tokens:
+            if token_type == VARIABLE:
+                if token_value not in local_names:
+                    statement.reads.add(token_value)
+                typed_tokens.append((NUMBER, self._variable_type(token_value)))
+            elif token_type == NUMBER:
+                typed_tokens.append((NUMBER, ValueType.Integer))
+            elif token_type == STRING:
+                typed_tokens.append((STRING, ValueType.String))
+            else:
+                typed_tokens.append((token_type, token_value))
+
+        self._statement = statement
+        self._local_names = local_names
+        all_numeric = self._all_numeric
+        self._all_numeric = True
+        try:
+            value_type = self._expr_interpreter.reduce(typed_tokens, self._apply_operator_type)
+        except ValueError as e:
+            self._error(f"{e}: {expr}")
+            return None
+        finally:
+            proven_numeric = self._all_numeric
+            self._all_numeric = all_numeric
+
+        self._analysis.expression_types[expr] = value_type
+        if proven_numeric and value_type in ProgramAnalyzer._numbers:
+            self._analysis.numeric_expressions.add(expr)
+        return value_type
+
+    @staticmethod
+    def _variable_type(name):
+        return ValueType.String if name.endswith("$") else ValueType.Integer
+
+    @staticmethod
+    def _is_numeric(value_type):
+        return value_type in (ValueType.Integer, ValueType.Boolean, None)
+
+    def _type_error(self, operator, *operands):
+        names = ", ".join("string" if o == ValueType.String else "number" for o in operands)
+        raise ValueError(f"Type mismatch in '{operator}' ({names})")
+
+    def _apply_operator_type(self, stack, operator):
+        """Type-level counterpart of ExpressionInterpreter._apply_operator"""
+        nparams = self._expr_interpreter._operators[operator].nparams
+        if len(stack) < nparams:
+            raise ValueError(f"Operación no válida: {operator}")
+        operands = [stack.pop() for _ in range(nparams)][::-1]
+        if operator in ProgramAnalyzer._arithmetic and not all(o in ProgramAnalyzer._numbers for o in operands):
+            self._all_numeric = False
+
+        if operator in ('RND', 'PI', 'LEN') or operator in ProgramAnalyzer._numeric_unary:
+            expected = ValueType.String if operator == 'LEN' else ValueType.Integer
+            if operands and operands[0] is not None and (operands[0] == ValueType.String) != (expected == ValueType.String):
+                self._type_error(operator, *operands)
+            result = ValueType.Integer
+
+        elif operator in ('STR$', 'TAB'):
+            if not self._is_numeric(operands[0]):
+                self._type_error(operator, *operands)
+            result = ValueType.String
+
+        elif operator == 'VAL':
+            if operands[0] not in (ValueType.String, None):
+                self._type_error(operator, *operands)
+            result = None
+
+        elif operator == 'NOT':
+            result = ValueType.Boolean
+
+        elif operator == 'FN':
+            result = self._function_call_type(*operands)
+
+        elif operator in ProgramAnalyzer._comparisons:
+            left, right = operands
+            if None not in operands and (left == ValueType.String) != (right == ValueType.String):
+                self._type_error(operator, *operands)
+            result = ValueType.Boolean
+
+        elif operator in ProgramAnalyzer._numeric_binary or operator == 'AT':
+            if not all(self._is_numeric(o) for o in operands):
+                self._type_error(operator, *operands)
+            result = ValueType.String if operator == 'AT' else ValueType.Integer
+
+        elif operator == '+':
+            left, right = operands
+            if None in operands:
+                result = None
+            elif (left == ValueType.String) != (right == ValueType.String):
+                self._type_error(operator, *operands)
+            else:
+                result = left if left == ValueType.String else ValueType.Integer
+
+        elif operator == '*':
+            left, right = operands
+            if left == ValueType.String and right == ValueType.String:
+                self._type_error(operator, *operands)
+            if None in operands:
+                result = None
+            elif ValueType.String in operands:
+                result = ValueType.String
+            else:
+                result = ValueType.Integer
+
+        elif operator in ('TO', 'START_TO', 'TO_END'):
+            if operands[0] not in (ValueType.String, None) or not all(self._is_numeric(o) for o in operands[1:]):
+                self._type_error(operator, *operands)
+            result = ValueType.String
+
+        else:
+            result = None
+
+        stack.append(result)
+
+    def _function_call_type(self, name, params):
+        if name not in self._functions:
+            raise ValueError(f"Undefined function FN {name}")
+        definition_params, body = self._functions[name]
+        args = [p.strip() for p in params.split(',')]
+        if len(args) != len(definition_params):
+            raise ValueError(f"FN {name} expects {len(definition_params)} parameters")
+
+        statement, local_names = self._statement, self._local_names
+        for arg, param in zip(args, definition_params):
+            arg_type = self._expression(arg, statement, local_names)
+            if arg_type is not None and (arg_type == ValueType.String) != param.endswith("$"):
+                self._type_error(f"FN {name}", arg_type)
+        statement.reads.add(f"FN {name}")
+        if name in self._resolving:
+            return None
+        self._resolving.add(name)
+        result = self._expression(body, statement, definition_params)
+        self._resolving.discard(name)
+        self._statement, self._local_names = statement, local_names
+        return result
+
+    # ------------------------------------------------------------------
+    # Control flow
+    # ------------------------------------------------------------------
+
+    def _build_graph(self, statements):
+        program_length = len(self._program)
+        return_sites = [idx + 1 for idx, s in enumerate(statements) if s.gosub]
+        for_sites = {}
+        for idx, statement in enumerate(statements):
+            if statement.for_variable is not None:
+                for_sites.setdefault(statement.for_variable, []).append(idx + 1)
+
+        successors = self._analysis.successors
+        for idx, statement in enumerate(statements):
+            self._line_number, _, self._code = self._program[idx]
+            targets = [self._line_index[line] for line in statement.jumps]
+            if statement.falls_through:
+                targets.append(idx + 1)
+            if statement.is_return:
+                targets += return_sites
+            if statement.next_variable is not None:
+                if statement.next_variable not in for_sites:
+                    self._error(f"NEXT without FOR: {statement.next_variable}")
+                targets += for_sites.get(statement.next_variable, [])
+            successors.append(tuple(sorted(set(t for t in targets if t < program_length))))
+
+        pending = [0] if program_length else []
+        reachable = self._analysis.reachable
+        while pending:
+            idx = pending.pop()
+            if idx in reachable:
+                continue
+            reachable.add(idx)
+            pending += successors[idx]
+
+        if not return_sites:
+            for idx, statement in enumerate(statements):
+                if statement.is_return and idx in reachable:
+                    self._line_number, _, self._code = self._program[idx]
+                    self._error("RETURN without GO SUB")
+
+    def _check_assignments(self, statements):
+        """Reports variables and functions that are read before any possible assignment"""
+        assigned_in = {0: self._defined} if self._program else {}
+        pending = [0] if self._program else []
+        while pending:
+            idx = pending.pop()
+            assigned_out = assigned_in[idx] | statements[idx].writes
+            for successor in self._analysis.successors[idx]:
+                current = assigned_in.get(successor)
+                if current is None or not assigned_out <= current:
+                    assigned_in[successor] = assigned_out if current is None else current | assigned_out
+                    pending.append(successor)
+
+        for idx in sorted(assigned_in):
+            missing = statements[idx].reads - assigned_in[idx]
+            if missing:
+                self._line_number, _, self._code = self._program[idx]
+                for name in sorted(missing):
+                    if name.startswith("FN "):
+                        self._error(f"Function {name} used before its DEF FN")
+                    else:
+                        self._error(f"Variable '{name}' used before assignment")
@@ -0,0 +1,37 @@
+from array import array
+
+class ProgramStore:
+    """
+    Sentencias del programa en columnas paralelas: números de línea e índices de parte
+    en array('i') (4 bytes cada uno) y el código en una lista, en lugar de una tupla
+    por sentencia.
+
+    Indexar o recorrer el programa devuelve tuplas (line_number, part_index, code)
+    construidas al vuelo.
+    """
+
+    __slots__ = ("line_numbers", "part_indexes", "codes")
+
+    def __init__(self, entries=()):
+        """
+        entries: [(line_number, part_index, code)] ordenadas por línea y parte
+        """
+        self.line_numbers = array('i')
+        self.part_indexes = array('i')
+        self.codes = []
+        self.replace(0, 0, entries)
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __getitem__(self, idx):
+        return self.line_numbers[idx], self.part_indexes[idx], self.codes[idx]
+
+    def __iter__(self):
+        return zip(self.line_numbers, self.part_indexes, self.codes)
+
+    def replace(self, start, end, entries):
+        """Sustituye las sentencias [start, end) por entries [(line_number, part_index, code)]"""
+        self.line_numbers[start:end] = array('i', [line_number for line_number, _, _ in entries])
+        self.part_indexes[start:end] = array('i', [part_index for _, part_index, _ in entries])
+        self.codes[start:end] = [code for _, _, code in entries]
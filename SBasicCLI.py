@@ -1,28 +1,122 @@
-import argparse
+import sys
 
-from BasicInterpreter import BasicInterpreter
+# The interpreter modules are imported only by the options that use them, so that
+# a client of the server mode starts without loading the interpreter at all.
 
 
 def main():
+    connect_args = _parse_connect_arguments(sys.argv[1:])
+    if connect_args is not None:
+        connect(*connect_args)
+        return
+
+    import argparse
     parser = argparse.ArgumentParser(
                     prog='SBasic',
                     description='Sinclair-Spectrum-alike BASIC Interpreter',
                     epilog='This is not a Sinclair Spectrum emulator, but just a programming tool that resembles how programming was donde these days.')
 
-    parser.add_argument("filepath", help="Old-fashioned BASIC program file")
+    parser.add_argument("filepath", nargs="?", help="Old-fashioned BASIC program file (an interactive session is started if omitted)")
+    parser.add_argument("--no-check", action="store_true", help="Skip the static analysis performed before running the program")
+    parser.add_argument("--fn-cache-size", metavar="SIZE", type=int, default=256, help="Results cached per pure DEF FN function (0 disables the cache)")
+    parser.add_argument("--render", action="store_true", help="Draw the output on a 24x32 virtual screen, refreshing only the changed cells")
+    parser.add_argument("--trace", metavar="LOGFILE", help="Record the execution into a binary trace log")
+    parser.add_argument("--watch", metavar="VARIABLES", default="", help="Comma separated variables whose writes are recorded in the trace log")
+    parser.add_argument("--replay", metavar="LOGFILE", help="Re-execute the program deterministically from a trace log")
+    parser.add_argument("--until-line", metavar="LINE", type=int, help="Stop the replay before the given line number")
+    parser.add_argument("--until-step", metavar="COUNT", type=int, help="Stop the replay after the given number of statements")
+    parser.add_argument("--serve", metavar="SOCKET", help="Keep a warm interpreter listening on a Unix socket")
+    parser.add_argument("--connect", metavar="SOCKET", help="Run the program in the interpreter listening on a Unix socket")
 
     args = parser.parse_args()
 
+    if args.serve:
+        from SBasicServer import serve
+        serve(args.serve)
+        return
+
     if not args.filepath:
-        parser.print_help()
+        from BasicInterpreter import BasicInterpreter
+        from SBasicREPL import BasicREPL
+        BasicREPL(BasicInterpreter(static_check=not args.no_check, fn_cache_size=args.fn_cache_size)).loop()
+        return
+
+    if args.connect:
+        connect(args.connect, args.filepath, args.no_check, args.render, args.fn_cache_size)
         return
 
     with open(args.filepath) as file:
         program = file.readlines()
 
-    interpreter = BasicInterpreter()
+    from BasicInterpreter import BasicInterpreter
+    from TerminalOutput import ScreenRenderer
+
+    output = ScreenRenderer() if args.render else None
+    interpreter = BasicInterpreter(static_check=not args.no_check, output=output, fn_cache_size=args.fn_cache_size)
     interpreter.load(program)
-    interpreter.run()
+
+    if args.replay:
+        replay(interpreter, args)
+    elif args.trace:
+        from ExecutionTrace import TraceRecorder
+        watch = [name.strip() for name in args.watch.split(",") if name.strip()]
+        with open(args.trace, "wb") as log:
+            interpreter.set_tracer(TraceRecorder(log, watch))
+            interpreter.run()
+    else:
+        interpreter.run()
+
+
+def _parse_connect_arguments(argv):
+    """
+    Fast path for the client of the server mode: it parses the options --connect
+    accepts without importing argparse. Returns None for any other command line.
+    """
+    options = {"--no-check": False, "--render": False}
+    socket_path, filepath, fn_cache_size = None, None, 256
+    arguments = iter(argv)
+    for argument in arguments:
+        if argument == "--connect":
+            socket_path = next(arguments, None)
+        elif argument == "--fn-cache-size":
+            value = next(arguments, "")
+            if not value.isdigit():
+                return None
+            fn_cache_size = int(value)
+        elif argument in options:
+            options[argument] = True
+        elif argument.startswith("-") or filepath is not None:
+            return None
+        else:
+            filepath = argument
+    if socket_path is None or filepath is None:
+        return None
+    return socket_path, filepath, options["--no-check"], options["--render"], fn_cache_size
+
+
+def connect(socket_path, filepath, no_check, render, fn_cache_size):
+    from SBasicServer import run_remote
+
+    with open(filepath) as file:
+        program = file.read()
+    run_remote(socket_path, program, no_check, render, fn_cache_size)
+
+
+def replay(interpreter, args):
+    from ExecutionTrace import TraceReplayer
+
+    with open(args.replay, "rb") as log:
+        replayer = TraceReplayer(log)
+        line_number = replayer.replay(interpreter, args.until_line, args.until_step)
+
+    if line_number is None:
+        return
+    print(f"\r\nReplay stopped before line {line_number} after {replayer.steps()} statements")
+    for name, value in sorted(interpreter._num_variables.items()):
+        if not name.startswith("for_"):
+            print(f"{name} = {value:g}")
+    for name, value in sorted(interpreter._str_variables.items()):
+        print(f'{name} = "{value}"')
 
 
 if __name__ == "__main__":
@@ -0,0 +1,60 @@
+from BasicInterpreter import BasicInterpreter
+
+
+class BasicREPL:
+    """
+    Spectrum-alike interactive session.
+
+    A line starting with a number is stored in the program (a bare number deletes
+    the line). RUN, LIST, GO TO, CONTINUE and NEW act on the stored program, and
+    any other line is executed immediately.
+    """
+
+    def __init__(self, interpreter=None, input_function=input):
+        self._interpreter = interpreter if interpreter is not None else BasicInterpreter()
+        self._input_function = input_function
+        self._interpreter.load([])
+
+    def loop(self):
+        while True:
+            try:
+                line = self._input_function("> ")
+            except EOFError:
+                print()
+                return
+            except KeyboardInterrupt:
+                print()
+                continue
+            self.execute(line)
+
+    def execute(self, line):
+        line = line.strip()
+        if not line:
+            return
+
+        number_str, _, code = line.partition(" ")
+        if number_str.isdigit():
+            self._interpreter.store_line(int(number_str), code)
+            return
+
+        command = line.upper()
+        if command == "RUN" or command.startswith("RUN "):
+            self._interpreter.clear()
+            self._interpreter.run(self._line_argument(line))
+        elif command == "LIST" or command.startswith("LIST "):
+            for number, source in self._interpreter.list_lines(self._line_argument(line)):
+                print(f"{number} {source}")
+        elif command.startswith("GO TO") or command.startswith("GOTO"):
+            self._interpreter.continue_run(self._line_argument(line))
+        elif command == "CONTINUE":
+            self._interpreter.continue_run()
+        elif command == "NEW":
+            self._interpreter.clear()
+            self._interpreter.load([])
+        else:
+            self._interpreter.execute_direct(line)
+
+    @staticmethod
+    def _line_argument(line):
+        argument = line.split()[-1]
+        return int(argument) if argument.isdigit() else 0
@@ -0,0 +1,127 @@
+import os
+import sys
+
+# Request sent by the client through the Unix socket:
+#
+#   SBASIC <no_check> <render> <fn_cache_size> <program bytes>\n
+#   <program source>
+#
+# followed by whatever the client reads from its standard input, which the
+# program receives as INPUT lines. The server answers with the program output
+# and closes the connection.
+
+_HEADER = "SBASIC"
+
+
+def serve(socket_path):
+    """
+    Keeps a warm interpreter process listening on a Unix socket. Every program is
+    run in a forked child, so it starts with the modules already imported and
+    cannot disturb the next one.
+    """
+    import signal
+    import socket
+
+    # Import everything a request may need once, before forking
+    import io
+    import BasicInterpreter
+    import ProgramAnalyzer
+    import TerminalOutput
+
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+    signal.signal(signal.SIGCHLD, signal.SIG_IGN)   # children are reaped automatically
+
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(socket_path)
+    server.listen()
+    try:
+        while True:
+            connection, _ = server.accept()
+            if os.fork() == 0:
+                # The child never leaves this block: an exception must not reach the
+                # parent's finally, which removes the socket
+                try:
+                    server.close()
+                    _run_request(connection)
+                except BaseException:
+                    pass
+                finally:
+                    os._exit(0)
+            connection.close()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+        os.unlink(socket_path)
+
+
+def _run_request(connection):
+    import io
+    from BasicInterpreter import BasicInterpreter
+    from TerminalOutput import ScreenRenderer
+
+    stream = connection.makefile("rb")
+    try:
+        header = stream.readline().decode().split()
+        if len(header) != 5 or header[0] != _HEADER:
+            raise ValueError
+        no_check, render, fn_cache_size, program_size = (int(field) for field in header[1:])
+        if program_size < 0:
+            raise ValueError
+        program = stream.read(program_size).decode()
+    except ValueError:      # also UnicodeDecodeError
+        connection.sendall(b"Error: Invalid request\n")
+        connection.close()
+        return
+
+    output = connection.makefile("w", encoding="utf-8")
+    sys.stdout = output
+    sys.stdin = io.TextIOWrapper(stream, encoding="utf-8")
+    try:
+        interpreter = BasicInterpreter(static_check=not no_check, output=ScreenRenderer() if render else None,
+            fn_cache_size=fn_cache_size)
+        interpreter.load(program.splitlines())
+        interpreter.run()
+    except Exception as e:
+        print(f"\r\nError: {e}")
+    finally:
+        output.flush()
+        connection.close()
+
+
+def run_remote(socket_path, program, no_check=False, render=False, fn_cache_size=256):
+    """
+    Runs the program in the server listening on socket_path, forwarding the standard
+    input to it and copying its output to the standard output
+    """
+    # The low level modules avoid importing socket (and enum with it) in the client
+    import _socket
+    from select import select
+
+    program_data = program.encode()
+    header = f"{_HEADER} {int(no_check)} {int(render)} {fn_cache_size} {len(program_data)}\n"
+
+    client = _socket.socket(_socket.AF_UNIX, _socket.SOCK_STREAM)
+    client.connect(socket_path)
+    try:
+        client.sendall(header.encode() + program_data)
+        stdin_fd = sys.stdin.fileno()
+        sources = [client, stdin_fd]
+        while True:
+            readable, _, _ = select(sources, [], [])
+            if stdin_fd in readable:
+                data = os.read(stdin_fd, 65536)
+                if data:
+                    client.sendall(data)
+                else:
+                    client.shutdown(_socket.SHUT_WR)
+                    sources.remove(stdin_fd)
+            if client in readable:
+                data = client.recv(65536)
+                if not data:
+                    break
+                sys.stdout.buffer.write(data)
+                sys.stdout.flush()
+    finally:
+        client.close()
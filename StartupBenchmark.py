@@ -0,0 +1,88 @@
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# Startup budget in milliseconds, on top of the bare Python interpreter start.
+# The benchmark fails (exit status 1) when a median measurement exceeds its budget.
+BUDGET_MS = {
+    "import": 40,       # importing BasicInterpreter
+    "first_line": 5,    # BasicInterpreter(), load() and run() of a two-line program
+    "cli": 75,          # SBasicCLI.py running a two-line program
+    "client": 30,       # SBasicCLI.py --connect running a two-line program
+}
+
+_TINY_PROGRAM = "10 LET a = 1 + 2\n20 PRINT a\n"
+
+_IN_PROCESS = """
+import io, sys, time
+start = time.perf_counter()
+from BasicInterpreter import BasicInterpreter
+imported = time.perf_counter()
+stdout, sys.stdout = sys.stdout, io.StringIO()
+interpreter = BasicInterpreter()
+interpreter.load({program!r}.splitlines())
+interpreter.run()
+finished = time.perf_counter()
+sys.stdout = stdout
+print((imported - start) * 1000, (finished - imported) * 1000)
+"""
+
+
+def _wall_time(command, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(command, stdout=subprocess.DEVNULL, stdin=subprocess.DEVNULL, check=True)
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times)
+
+
+def measure(repeat=20, socket_path=None):
+    """Returns {measurement: median milliseconds}; cli and client exclude the bare interpreter start"""
+    here = os.path.dirname(os.path.abspath(__file__))
+    cli = os.path.join(here, "SBasicCLI.py")
+    results = {}
+
+    imports, first_lines = [], []
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, "-c", _IN_PROCESS.format(program=_TINY_PROGRAM)],
+            cwd=here, capture_output=True, text=True, check=True).stdout
+        import_ms, first_line_ms = (float(value) for value in output.split())
+        imports.append(import_ms)
+        first_lines.append(first_line_ms)
+    results["import"] = statistics.median(imports)
+    results["first_line"] = statistics.median(first_lines)
+
+    python_ms = _wall_time([sys.executable, "-c", "pass"], repeat)
+    with tempfile.NamedTemporaryFile("w", suffix=".bas", delete=False) as program:
+        program.write(_TINY_PROGRAM)
+    try:
+        results["cli"] = _wall_time([sys.executable, cli, program.name], repeat) - python_ms
+        if socket_path:
+            results["client"] = _wall_time([sys.executable, cli, "--connect", socket_path, program.name], repeat) - python_ms
+    finally:
+        os.unlink(program.name)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SBasic startup benchmark")
+    parser.add_argument("--repeat", type=int, default=20, help="Runs per measurement")
+    parser.add_argument("--socket", help="Also measure the client of a server started with SBasicCLI.py --serve SOCKET")
+    args = parser.parse_args()
+
+    results = measure(args.repeat, args.socket)
+    within_budget = True
+    for name, milliseconds in results.items():
+        over = milliseconds > BUDGET_MS[name]
+        within_budget = within_budget and not over
+        print(f"{name:12} {milliseconds:8.2f} ms   budget {BUDGET_MS[name]:4} ms   {'OVER BUDGET' if over else 'ok'}")
+    sys.exit(0 if within_budget else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+import re
+import sys
+
+# Spectrum colour number -> ANSI colour number
+ANSI_COLORS = { 0: 0, 1: 4, 2: 1, 3: 5, 4: 2, 5: 6, 6: 3, 7: 7 }
+
+# Escape sequences produced by the AT and TAB operators
+_POSITION_CODES = re.compile(r'\x1b\[([\d.]+);([\d.]+)f|\x1b\[([\d.]+)G')
+
+
+class AnsiTerminal:
+    """Writes every PRINT, CLS and colour change straight to the terminal as ANSI codes"""
+
+    def __init__(self):
+        self._bright = False
+        self._ink_color = 7
+        self._paper_color = 0
+
+    def write(self, text):
+        print(text, end="", flush=True)
+
+    def newline(self):
+        print(flush=True)
+
+    def cls(self):
+        print("\x1b[2J\x1b[H", end="")
+
+    def set_ink(self, color):
+        self._ink_color = color
+        self._apply_ink_color()
+
+    def set_paper(self, color):
+        self._paper_color = color
+        self._apply_paper_color()
+
+    def set_bright(self, bright):
+        self._bright = bright
+        self._apply_ink_color()
+        self._apply_paper_color()
+
+    def set_flash(self, flash):
+        print(f"\x1b[{5 if flash else 25}m", end="")
+
+    def frame(self):
+        pass
+
+    def prepare_input(self):
+        pass
+
+    def message(self, text):
+        print(text)
+
+    def reset(self):
+        print("\x1b[0m",end="")
+
+    def _apply_ink_color(self):
+        print(f"\x1b[{(90 if self._bright else 30) + ANSI_COLORS[self._ink_color]}m", end="")
+
+    def _apply_paper_color(self):
+        print(f"\x1b[{(100 if self._bright else 40) + ANSI_COLORS[self._paper_color]}m", end="")
+
+
+class ScreenRenderer:
+    """
+    Spectrum-alike 24x32 character screen kept in memory.
+
+    PRINT, AT, TAB, CLS and the colour keywords only change the model; the cells
+    changed since the previous frame are sent to the terminal at frame boundaries
+    (WAIT, INPUT and the end of the program).
+    """
+
+    ROWS = 24
+    COLUMNS = 32
+
+    def __init__(self, stream=None):
+        """
+        stream: text stream that receives the ANSI output (sys.stdout by default)
+        """
+        self._stream = stream if stream is not None else sys.stdout
+        self._ink_color = 7
+        self._paper_color = 0
+        self._bright = False
+        self._flash = False
+        self._row = 0
+        self._column = 0
+        blank = self._blank_cell()
+        self._cells = [[blank] * ScreenRenderer.COLUMNS for _ in range(ScreenRenderer.ROWS)]
+        self._shown = [[blank] * ScreenRenderer.COLUMNS for _ in range(ScreenRenderer.ROWS)]
+        self._dirty = set()
+        self._terminal_cursor = None        # where the terminal cursor is, if known
+        self._terminal_attributes = None    # attributes last sent to the terminal
+        self._stream.write("\x1b[0m\x1b[2J")
+
+    # ------------------------------------------------------------------
+    # Screen model
+    # ------------------------------------------------------------------
+
+    def lines(self):
+        """Text of the screen, one string per row"""
+        return ["".join(cell[0] for cell in row) for row in self._cells]
+
+    def cell(self, row, column):
+        """(character, ink, paper, bright, flash) of the given cell"""
+        return self._cells[row][column]
+
+    def cursor(self):
+        return self._row, self._column
+
+    def _blank_cell(self):
+        return (" ", self._ink_color, self._paper_color, self._bright, self._flash)
+
+    def write(self, text):
+        position = 0
+        for match in _POSITION_CODES.finditer(text):
+            self._write_chars(text[position:match.start()])
+            if match.group(3) is not None:
+                self._tab(int(float(match.group(3))))
+            else:
+                self._at(int(float(match.group(1))), int(float(match.group(2))))
+            position = match.end()
+        self._write_chars(text[position:])
+
+    def _write_chars(self, text):
+        for char in text:
+            if char == "\n":
+                self.newline()
+                continue
+            if self._column >= ScreenRenderer.COLUMNS:
+                self.newline()
+            self._cells[self._row][self._column] = (char, self._ink_color, self._paper_color, self._bright, self._flash)
+            self._dirty.add((self._row, self._column))
+            self._column += 1
+
+    # AT and TAB are ANSI cursor moves: 1-based, 0 counts as 1 and positions outside
+    # the screen are clamped to its edge, as the terminal does without --render
+
+    @staticmethod
+    def _clamp(position, size):
+        return min(max(position, 1), size) - 1
+
+    def _at(self, row, column):
+        self._row = ScreenRenderer._clamp(row, ScreenRenderer.ROWS)
+        self._column = ScreenRenderer._clamp(column, ScreenRenderer.COLUMNS)
+
+    def _tab(self, column):
+        self._column = ScreenRenderer._clamp(column, ScreenRenderer.COLUMNS)
+
+    def newline(self):
+        self._column = 0
+        self._row += 1
+        if self._row == ScreenRenderer.ROWS:
+            self._scroll()
+
+    def _scroll(self):
+        self._cells.pop(0)
+        self._cells.append([self._blank_cell()] * ScreenRenderer.COLUMNS)
+        self._row = ScreenRenderer.ROWS - 1
+        self._dirty.update((row, column) for row in range(ScreenRenderer.ROWS) for column in range(ScreenRenderer.COLUMNS))
+
+    def cls(self):
+        blank = self._blank_cell()
+        self._cells = [[blank] * ScreenRenderer.COLUMNS for _ in range(ScreenRenderer.ROWS)]
+        self._dirty.update((row, column) for row in range(ScreenRenderer.ROWS) for column in range(ScreenRenderer.COLUMNS))
+        self._row = 0
+        self._column = 0
+
+    def set_ink(self, color):
+        self._ink_color = color
+
+    def set_paper(self, color):
+        self._paper_color = color
+
+    def set_bright(self, bright):
+        self._bright = bright
+
+    def set_flash(self, flash):
+        self._flash = flash
+
+    # ------------------------------------------------------------------
+    # Terminal output
+    # ------------------------------------------------------------------
+
+    def frame(self):
+        """Sends the cells changed since the previous frame to the terminal"""
+        out = []
+        cursor = self._terminal_cursor
+        attributes = self._terminal_attributes
+        for row, column in sorted(self._dirty):
+            cell = self._cells[row][column]
+            if cell == self._shown[row][column]:
+                continue
+            if cursor != (row, column):
+                out.append(f"\x1b[{row + 1};{column + 1}H")
+            if attributes != cell[1:]:
+                attributes = cell[1:]
+                out.append(self._sgr(*attributes))
+            out.append(cell[0])
+            self._shown[row][column] = cell
+            cursor = (row, column + 1)
+        self._dirty.clear()
+        self._terminal_cursor = cursor
+        self._terminal_attributes = attributes
+
+        if out:
+            self._stream.write("".join(out))
+        self._stream.flush()
+
+    @staticmethod
+    def _sgr(ink, paper, bright, flash):
+        return (f"\x1b[0;{(90 if bright else 30) + ANSI_COLORS[ink]};"
+            f"{(100 if bright else 40) + ANSI_COLORS[paper]}{';5' if flash else ''}m")
+
+    def _park(self):
+        """Moves the terminal cursor below the screen with the default attributes"""
+        self.frame()
+        self._stream.write(f"\x1b[0m\x1b[{ScreenRenderer.ROWS + 1};1H")
+        self._terminal_cursor = None
+        self._terminal_attributes = None
+
+    def prepare_input(self):
+        self._park()
+        self._stream.flush()
+
+    def message(self, text):
+        self._park()
+        self._stream.write(f"{text}\n")
+        self._stream.flush()
+
+    def reset(self):
+        self.frame()
+        self._stream.write("\x1b[0m")
+        self._stream.flush()
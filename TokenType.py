@@ -0,0 +1,10 @@
+# Token types: small integers instead of strings. The tokens that are values for the
+# Shunting Yard algorithm come first, so reduce() tells them apart with one comparison.
+NUMBER = 0
+STRING = 1
+FUNCTION_NAME = 2
+FUNCTION_PARAMS = 3
+OPERATOR = 4
+VARIABLE = 5
+PAREN_OPEN = 6
+PAREN_CLOSE = 7